@@ -0,0 +1,145 @@
+# batch.py
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from handler import ResultMerger, analyze_pdf
+
+# Output name of the combined results; never given to a single PDF
+MERGED_NAME = 'merged'
+
+
+def collect_pdfs(inputs: list[str]) -> list[str]:
+    """Expand directories and glob patterns into a sorted list of PDF paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.update(glob.glob(os.path.join(item, '**', '*.pdf'), recursive=True))
+        else:
+            paths.update(path for path in glob.glob(item) if path.lower().endswith('.pdf'))
+    return sorted(paths)
+
+
+def output_names(pdf_paths: list[str]) -> dict[str, str]:
+    """
+    Map each PDF to a unique output file name (without extension): its path relative
+    to the PDFs' common directory, with separators replaced, plus a numeric suffix
+    where names still collide.
+    """
+    absolute = [os.path.abspath(path) for path in pdf_paths]
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    except ValueError:
+        # Paths on different drives have no common directory
+        root = None
+
+    names = {}
+    taken = {MERGED_NAME}
+    for path, full_path in zip(pdf_paths, absolute):
+        relative = os.path.relpath(full_path, root) if root else os.path.basename(full_path)
+        base = os.path.splitext(relative)[0].replace(os.sep, '__')
+        name, suffix = base, 1
+        # Case-insensitive, as output files may land on a case-insensitive file system
+        while name.lower() in taken:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        taken.add(name.lower())
+        names[path] = name
+    return names
+
+
+def _analyze_file(pdf_path: str, batched: bool, fast_tokenizer: bool):
+    """Worker task: analyze one PDF and time it."""
+    start = time.perf_counter()
+    analyzer = analyze_pdf(pdf_path, batched, fast_tokenizer=fast_tokenizer)
+    lexemes, connections = analyzer.result()
+    return (pdf_path, (lexemes, connections, analyzer.word_count, analyzer.tokenize_seconds),
+            time.perf_counter() - start)
+
+
+def write_json(path: str, lexemes, connections):
+    """Write results in the same layout as the 'data' part of a saved project."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'lexemes': lexemes, 'connections': connections}, f, ensure_ascii=False, indent=4)
+
+
+def write_csv(path: str, lexemes, connections):
+    """Write one row per wordform, with the same columns as the results table."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Wordform", "WF Freq", "Lexeme", "Lex Freq"])
+        for lemma in sorted(lexemes):
+            for wf, wf_freq in sorted(connections.get(lemma, {}).items()):
+                writer.writerow([wf, wf_freq, lemma, lexemes[lemma]])
+
+
+def write_results(output_dir: str, name: str, formats: list[str], lexemes, connections):
+    if 'json' in formats:
+        write_json(os.path.join(output_dir, name + '.json'), lexemes, connections)
+    if 'csv' in formats:
+        write_csv(os.path.join(output_dir, name + '.csv'), lexemes, connections)
+
+
+def run_batch(pdf_paths: list[str], output_dir: str, formats: list[str],
+              workers: int | None = None, batched: bool = True, fast_tokenizer: bool = False):
+    """Analyze PDFs across a process pool, writing per-file and merged results."""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    names = output_names(pdf_paths)
+    # Results are merged as files complete, so only the running totals are kept
+    merger = ResultMerger()
+    total_start = time.perf_counter()
+    # "spawn" matches the GUI's page-range pool
+    with ProcessPoolExecutor(max_workers=min(workers, len(pdf_paths)), mp_context=get_context("spawn")) as pool:
+        futures = {pool.submit(_analyze_file, path, batched, fast_tokenizer) for path in pdf_paths}
+        for future in as_completed(futures):
+            path, result, seconds = future.result()
+            # Drop the future's reference, so the result is freed once it is merged and written
+            futures.discard(future)
+            lexemes, connections, word_count, _ = result
+            merger.add(result)
+
+            write_results(output_dir, names[path], formats, lexemes, connections)
+            rate = word_count / seconds if seconds else 0
+            print(f"{path}: {word_count} words, {len(lexemes)} lexemes in {seconds:.2f}s ({rate:.0f} words/s)")
+
+    lexemes, connections, word_count = merger.result()
+    write_results(output_dir, MERGED_NAME, formats, lexemes, connections)
+
+    elapsed = time.perf_counter() - total_start
+    rate = word_count / elapsed if elapsed else 0
+    print(f"Total: {len(pdf_paths)} files, {word_count} words, {len(lexemes)} lexemes "
+          f"in {elapsed:.2f}s ({rate:.0f} words/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch lexeme/wordform analysis of PDF files (no GUI).")
+    parser.add_argument('inputs', nargs='+', help="PDF files, directories or glob patterns")
+    parser.add_argument('-o', '--output-dir', default='batch_results', help="directory for result files")
+    parser.add_argument('-f', '--format', choices=['json', 'csv', 'both'], default='both',
+                        help="output format (default: both)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--per-word-tagging', action='store_true',
+                        help="tag words one by one instead of whole sentences")
+    parser.add_argument('--fast-tokenizer', action='store_true',
+                        help="find words with a single regex instead of NLTK's word_tokenize")
+    args = parser.parse_args(argv)
+
+    pdf_paths = collect_pdfs(args.inputs)
+    if not pdf_paths:
+        parser.error("no PDF files found")
+
+    formats = ['json', 'csv'] if args.format == 'both' else [args.format]
+    run_batch(pdf_paths, args.output_dir, formats, args.workers,
+              batched=not args.per_word_tagging, fast_tokenizer=args.fast_tokenizer)
+
+
+if __name__ == "__main__":
+    main()
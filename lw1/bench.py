@@ -0,0 +1,248 @@
+# bench.py
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+import fitz
+import nltk
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize, sent_tokenize
+
+from cache import LemmaCache
+from handler import (PIPELINE_VERSION, extract_text_from_pdf, fast_word_tokenize, penn_to_wordnet,
+                     process_text)
+
+# Corpus sizes in words; each run covers all of them to show how the stages scale
+SIZES = (1000, 10000, 100000)
+WORDS_PER_PAGE = 300
+
+# Inflected forms of a small vocabulary, so lemmatization has real work to do
+VOCABULARY = (
+    "the a an and but of to in on with at from by for he she it they we you his her their "
+    "is was are were be been being has had have do did does done can could will would "
+    "cat cats dog dogs house houses wizard wizards wand wands letter letters child children "
+    "man men woman women mouse mice night nights castle castles school schools friend friends "
+    "run runs running ran walk walks walked walking say says said saying look looks looked "
+    "see sees saw seen take takes took taken think thinks thought go goes went gone "
+    "quick quicker quickest dark darker darkest old older oldest good better best "
+    "quickly slowly quietly suddenly never always again still very "
+    "don't can't isn't it's he'd they're wizard's children's well-known"
+).split()
+
+
+def synthetic_text(word_count: int, seed: int = 0) -> str:
+    """Deterministic English-like text of roughly word_count words."""
+    rng = random.Random(seed)
+    sentences = []
+    words = 0
+    while words < word_count:
+        length = min(rng.randint(5, 20), word_count - words)
+        tokens = rng.choices(VOCABULARY, k=length)
+        tokens[0] = tokens[0].capitalize()
+        if length > 6 and rng.random() < 0.3:
+            tokens[length // 2] += ","
+        sentences.append(" ".join(tokens) + rng.choice(".....?!"))
+        words += length
+    return " ".join(sentences)
+
+
+def write_synthetic_pdf(path: str, text: str):
+    """Write text to a PDF, about WORDS_PER_PAGE words per page."""
+    words = text.split()
+    doc = fitz.open()
+    for start in range(0, len(words), WORDS_PER_PAGE):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(words[start:start + WORDS_PER_PAGE]),
+                            fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def measure(func, *args, repeat: int = 1):
+    """
+    Run func(*args) and return (result, best seconds, peak traced bytes).
+    Timing runs are untraced; one extra run under tracemalloc gives the memory peak.
+    """
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def tokenize(text: str) -> list[list[str]]:
+    return [word_tokenize(sentence) for sentence in sent_tokenize(text)]
+
+
+def fast_tokenize(text: str) -> list[list[str]]:
+    return [fast_word_tokenize(sentence) for sentence in sent_tokenize(text)]
+
+
+def verify_tokenizer(text: str) -> tuple[int, list[tuple[str, list[str], list[str]]]]:
+    """
+    Compare the fast tokenizer with word_tokenize + isalpha() sentence by sentence.
+    Returns (sentence count, [(sentence, expected, actual)] for every mismatch).
+    """
+    sentences = sent_tokenize(text)
+    mismatches = []
+    for sentence in sentences:
+        expected = [token for token in word_tokenize(sentence) if token.isalpha()]
+        actual = fast_word_tokenize(sentence)
+        if actual != expected:
+            mismatches.append((sentence, expected, actual))
+    return len(sentences), mismatches
+
+
+def read_sample(path: str) -> str:
+    """Text of a sample corpus file (PDF or plain text)."""
+    if path.lower().endswith('.pdf'):
+        return extract_text_from_pdf(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def tag(tokenized: list[list[str]]) -> list[tuple[str, str]]:
+    # Same filtering as TextAnalyzer: tag with punctuation, keep alphabetic words
+    return [(token.lower(), penn_to_wordnet(tag))
+            for sentence in nltk.pos_tag_sents(tokenized)
+            for token, tag in sentence if token.isalpha()]
+
+
+def lemmatize(tagged: list[tuple[str, str]]) -> int:
+    # A fresh cache per run, as for a first-time analysis
+    lemmatizer = WordNetLemmatizer()
+    cache = LemmaCache()
+    for key in tagged:
+        if cache.get(key) is None:
+            cache.put(key, lemmatizer.lemmatize(*key))
+    return len(cache)
+
+
+def bench_size(word_count: int, workdir: str, repeat: int, seed: int) -> dict:
+    """Benchmark every stage on one synthetic document."""
+    pdf_path = os.path.join(workdir, f"synthetic_{word_count}.pdf")
+    write_synthetic_pdf(pdf_path, synthetic_text(word_count, seed))
+
+    stages = {}
+    text, stages['extraction'] = _stage(extract_text_from_pdf, pdf_path, repeat=repeat)
+    tokenized, stages['tokenization'] = _stage(tokenize, text, repeat=repeat)
+    _, stages['fast_tokenization'] = _stage(fast_tokenize, text, repeat=repeat)
+    tagged, stages['tagging'] = _stage(tag, tokenized, repeat=repeat)
+    _, stages['lemmatization'] = _stage(lemmatize, tagged, repeat=repeat)
+    _, stages['total'] = _stage(process_text, text, repeat=repeat)
+    _, stages['total_fast_tokenizer'] = _stage(process_text, text, True, None, True, repeat=repeat)
+
+    tokens = len(tagged)
+    for stage in stages.values():
+        stage['tokens_per_sec'] = round(tokens / stage['seconds']) if stage['seconds'] else None
+
+    _, mismatches = verify_tokenizer(text)
+    return {'words': word_count, 'tokens': tokens,
+            'pages': -(-word_count // WORDS_PER_PAGE), 'stages': stages,
+            'fast_tokenizer_mismatches': len(mismatches)}
+
+
+def _stage(func, *args, repeat):
+    result, seconds, peak = measure(func, *args, repeat=repeat)
+    return result, {'seconds': round(seconds, 6), 'peak_bytes': peak}
+
+
+def scaling(results: list[dict]) -> dict:
+    """
+    Per-stage scaling exponents between consecutive sizes:
+    about 1.0 is linear, noticeably more means the stage grows superlinearly.
+    """
+    curves = {}
+    for smaller, larger in zip(results, results[1:]):
+        size_ratio = math.log(larger['tokens'] / smaller['tokens'])
+        for name, stage in larger['stages'].items():
+            before = smaller['stages'][name]['seconds']
+            exponent = (math.log(stage['seconds'] / before) / size_ratio
+                        if before and stage['seconds'] and size_ratio else None)
+            curves.setdefault(name, []).append(
+                {'from': smaller['words'], 'to': larger['words'],
+                 'exponent': None if exponent is None else round(exponent, 3)})
+    return curves
+
+
+def compare(report: dict, baseline: dict):
+    """Print the time ratio of each stage against a previous report."""
+    previous = {result['words']: result['stages'] for result in baseline.get('results', [])}
+    for result in report['results']:
+        stages = previous.get(result['words'])
+        if stages is None:
+            continue
+        for name, stage in result['stages'].items():
+            before = stages.get(name, {}).get('seconds')
+            if before:
+                print(f"{result['words']:>8} words  {name:<20} x{stage['seconds'] / before:.2f} vs baseline")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lw1 text processing pipeline stage by stage.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help="document sizes in words")
+    parser.add_argument('--repeat', type=int, default=3, help="timing runs per stage (best is kept)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic text")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="JSON report path")
+    parser.add_argument('--baseline', help="previous JSON report to compare against")
+    parser.add_argument('--verify', nargs='+', metavar='FILE',
+                        help="only check the fast tokenizer against word_tokenize on these PDF/text files")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        failed = False
+        for path in args.verify:
+            sentences, mismatches = verify_tokenizer(read_sample(path))
+            print(f"{path}: {sentences - len(mismatches)}/{sentences} sentences tokenized identically")
+            for sentence, expected, actual in mismatches[:10]:
+                print(f"  {sentence!r}\n    word_tokenize: {expected}\n    fast:          {actual}")
+            failed = failed or bool(mismatches)
+        raise SystemExit(1 if failed else 0)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for word_count in sorted(args.sizes):
+            result = bench_size(word_count, workdir, args.repeat, args.seed)
+            results.append(result)
+            for name, stage in result['stages'].items():
+                print(f"{word_count:>8} words  {name:<20} {stage['seconds']:>10.4f}s  "
+                      f"{stage['tokens_per_sec'] or 0:>10} tokens/s  {stage['peak_bytes'] / 1024:>10.0f} KiB peak")
+
+    report = {
+        'meta': {
+            'pipeline_version': PIPELINE_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+        'scaling': scaling(results),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
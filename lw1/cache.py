@@ -0,0 +1,165 @@
+# cache.py
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from project_format import PROJECT_EXTENSION, save_project, load_project
+
+# Default number of (word, POS) entries kept by a LemmaCache
+LEMMA_CACHE_SIZE = 200000
+
+
+class LemmaCache:
+    """Bounded LRU memo of (word, POS) -> lemma with optional on-disk persistence."""
+
+    def __init__(self, max_size: int = LEMMA_CACHE_SIZE, path: str | None = None, track_new: bool = False):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Entries put since the last take_new_entries (worker processes send them back)
+        self._new_entries = [] if track_new else None
+
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached lemma for the key (or None) and count the hit/miss."""
+        lemma = self._entries.get(key)
+        if lemma is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return lemma
+
+    def put(self, key, lemma):
+        """Store a lemma, evicting the least recently used entry when full."""
+        if self._new_entries is not None:
+            self._new_entries.append((key, lemma))
+        self._store(key, lemma)
+
+    def _store(self, key, lemma):
+        self._entries[key] = lemma
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def take_new_entries(self):
+        """Return and forget the [(key, lemma)] entries put since the last call."""
+        entries, self._new_entries = self._new_entries, []
+        return entries
+
+    def merge(self, entries):
+        """Add entries made by another process's cache (hit/miss counters are unchanged)."""
+        for key, lemma in entries:
+            self._store(key, lemma)
+
+    def reset_stats(self):
+        """Zero the hit/miss counters (entries are kept)."""
+        self.hits = 0
+        self.misses = 0
+
+    def add_stats(self, hits, misses):
+        """Count the hits/misses of a worker process's cache."""
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self):
+        """Return hit/miss counters for the stats display."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def load(self):
+        """Warm the cache from disk; a missing or broken file leaves it empty."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                # Entries are stored oldest first, so insertion order restores LRU order
+                for word, pos, lemma in json.load(f):
+                    self._store((word, pos), lemma)
+        except (OSError, ValueError) as e:
+            print(f"Error loading lemma cache: {e}")
+            self._entries.clear()
+
+    def save(self):
+        """Write entries to disk in LRU order (atomic replace)."""
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([[word, pos, lemma] for (word, pos), lemma in self._entries.items()],
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving lemma cache: {e}")
+
+
+class ResultCache:
+    """
+    Analysis results stored on disk as binary projects, keyed by the PDF content
+    hash plus the pipeline version, with least-recently-used eviction by total size.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(pdf_path: str, pipeline_version: str) -> str:
+        """Hash the file content (in chunks) together with the pipeline version."""
+        digest = hashlib.sha256(pipeline_version.encode('utf-8'))
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return (store, word count) for a cached result, or None."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            store, meta = load_project(path)
+        except (OSError, ValueError) as e:
+            print(f"Error loading cached result: {e}")
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        return store, meta.get('word_count', 0)
+
+    def put(self, key, store, word_count):
+        """Store a result, then evict old entries beyond the size limit."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # The project's JSON section carries the result metadata
+            save_project(self._path(key), store, {'word_count': word_count})
+            self._evict(keep=key + PROJECT_EXTENSION)
+        except OSError as e:
+            print(f"Error saving cached result: {e}")
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + PROJECT_EXTENSION)
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(PROJECT_EXTENSION) and name != keep:
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = os.path.getsize(os.path.join(self.directory, keep)) + sum(size for _, size, _ in entries)
+        # Least recently used first; the entry just written always survives
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
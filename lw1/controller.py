@@ -2,9 +2,40 @@
 
 import time
 import json
-from PyQt6.QtWidgets import QFileDialog, QApplication
-from PyQt6.QtCore import QCoreApplication, QTimer
-from handler import extract_text_from_pdf, process_text
+import os
+import threading
+from PyQt6.QtWidgets import QFileDialog
+from PyQt6.QtCore import QThread
+from cache import LemmaCache, ResultCache
+from search_index import LexiconIndex
+from frequency import CorpusFrequencies
+from store import LexiconStore
+from documents import DocumentSet
+from project_format import PROJECT_EXTENSION, save_project, load_project
+
+# On-disk lemma cache shared between sessions
+LEMMA_CACHE_PATH = "lemma_cache.json"
+# On-disk cache of analysis results for previously opened PDFs
+RESULT_CACHE_DIR = "result_cache"
+
+PROJECT_FILTER = f"Project Files (*{PROJECT_EXTENSION})"
+JSON_FILTER = "JSON Files (*.json)"
+
+
+def _warm_up():
+    # Importing handler loads fitz and NLTK; the models load on first use otherwise
+    try:
+        from handler import load_models
+        load_models()
+    except Exception as e:
+        print(f"Error warming up the NLP models: {e}")
+
+
+def _intersect(keys, other):
+    """Intersect two key collections, iterating over the smaller one."""
+    if len(other) < len(keys):
+        keys, other = other, keys
+    return {key for key in keys if key in other}
 
 
 class TextProcessorController:
@@ -12,59 +43,188 @@ class TextProcessorController:
 
     def __init__(self, view):
         self.view = view
-        # Main data storage for the current project
-        self.data = {'lexemes': {}, 'connections': {}}
+        # Documents of the current project; self.data is their merged counts
+        self.documents = DocumentSet()
         self.comments = {}
+        # Filtered copy of the data shown in the table and the filters that built it
+        # (None while the table shows self.data itself)
+        self._shown = None
+        self._filters = None
+        # Substring search index over self.data, built lazily after the data is replaced
+        self._index = None
+        # Array-backed counts and sort orders, built lazily after the data changes
+        self._frequencies = None
+        self.lemma_cache = LemmaCache(path=LEMMA_CACHE_PATH)
+        self.result_cache = ResultCache(RESULT_CACHE_DIR)
+        # Split PDFs into page ranges across worker processes on multi-core machines
+        self.parallel = (os.cpu_count() or 1) > 1
+        # Background analysis of the current PDF (None when idle)
+        self._thread = None
+        self._worker = None
+        self._start_time = 0.0
+        # Whether the running analysis adds to the project or replaces it
+        self._add_to_project = False
+        self._processing_path = None
+        # Whether the table shows a snapshot of the running analysis
+        self._preview_shown = False
+        # Tokenizer of the running analysis, for the results display
+        self._tokenizer = None
 
         # Connect UI signals to controller methods
         self.view.open_file_requested.connect(self.handle_open_pdf)
+        self.view.add_document_requested.connect(self.handle_add_document)
+        self.view.remove_document_requested.connect(self.handle_remove_document)
         self.view.save_data_requested.connect(self.save_to_file)
         self.view.load_data_requested.connect(self.load_from_file)
         self.view.filter_requested.connect(self.apply_filters)
         self.view.add_data_requested.connect(self.handle_add_entry)
-
-    def handle_open_pdf(self):
+        self.view.cancel_requested.connect(self.cancel_processing)
+        self.view.comment_changed.connect(self.handle_comment_changed)
+
+    def warm_up(self):
+        """Load the PDF/NLP stack in the background, so the first analysis starts at once."""
+        threading.Thread(target=_warm_up, daemon=True).start()
+
+    @property
+    def data(self):
+        """Main data of the current project (dict-like: data['lexemes'], data['connections'])."""
+        return self.documents.aggregate
+
+    @property
+    def index(self):
+        """Substring search index of the current data, built on first search."""
+        if self._index is None:
+            self._index = LexiconIndex(self.data)
+        return self._index
+
+    @property
+    def frequencies(self):
+        """Frequency tables of the current data, rebuilt on first use after a change."""
+        if self._frequencies is None:
+            self._frequencies = CorpusFrequencies(self.data)
+        return self._frequencies
+
+    def handle_open_pdf(self, add_to_project=False):
         """Handle PDF selection, trigger analysis, and update the view."""
         # Open file dialog
         file_path, _ = QFileDialog.getOpenFileName(None, "Select PDF", "", "PDF Files (*.pdf)")
 
-        if file_path:
-            # Update UI state immediately
+        if file_path and self._thread is None:
+            self._add_to_project = add_to_project
+            self._processing_path = file_path
             self.view.set_processing_state(True)
+            self._start_processing(file_path)
 
-            # CRITICAL: Force the dialog to close and UI to refresh
-            QApplication.processEvents()
+    def handle_add_document(self):
+        """Analyze another PDF and add its counts to the current project."""
+        self.handle_open_pdf(add_to_project=True)
 
-            # Use a short delay to let the OS hide the file picker window
-            QTimer.singleShot(100, lambda: self._start_processing(file_path))
+    def handle_remove_document(self, path):
+        """Drop one document's counts from the project without rescanning the others."""
+        if path not in self.documents.documents:
+            return
+        self.documents.remove(path)
+        # The search index may keep stale entries; filters skip them
+        self._frequencies = None
+        self.view.set_documents(list(self.documents.documents))
+        self.apply_filters(self.view.search_input.text())
 
     def _start_processing(self, file_path):
-        """Heavy processing logic moved to a separate step to allow UI refresh."""
-        try:
-            QApplication.processEvents()
-            start_time = time.time()
-
-            text = extract_text_from_pdf(file_path)
-            lexemes, connections = process_text(text)
-
-            duration = round(time.time() - start_time, 4)
-            word_count = len(text.split())
-
-            self.data = {'lexemes': lexemes, 'connections': connections}
+        """Run the heavy analysis on a worker thread so the window stays responsive."""
+        self._start_time = time.time()
+        self.lemma_cache.reset_stats()
+        # Deferred import: it pulls in fitz and NLTK (usually already loaded by warm_up)
+        from worker import AnalysisWorker
+
+        self._thread = QThread()
+        fast_tokenizer = self.view.fast_tokenizer_box.isChecked()
+        self._tokenizer = "Regex" if fast_tokenizer else "NLTK"
+        self._worker = AnalysisWorker(file_path, self.lemma_cache, self.parallel, self.result_cache,
+                                      fast_tokenizer)
+        self._worker.moveToThread(self._thread)
+
+        self._thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self._on_progress)
+        self._worker.partial.connect(self._on_partial_results)
+        self._worker.finished.connect(self._on_processing_finished)
+        self._worker.failed.connect(self._on_processing_failed)
+        self._worker.cancelled.connect(self._on_processing_cancelled)
+        for signal in (self._worker.finished, self._worker.failed, self._worker.cancelled):
+            signal.connect(self._thread.quit)
+        self._thread.finished.connect(self._on_thread_finished)
+
+        self._thread.start()
+
+    def cancel_processing(self):
+        """Stop the running analysis; the current data is left untouched."""
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def _on_progress(self, pages_done, total_pages):
+        # Throughput over the whole run so far; the ETA assumes it stays the same
+        elapsed = time.time() - self._start_time
+        pages_per_sec = pages_done / elapsed if pages_done and elapsed > 0 else None
+        eta = (total_pages - pages_done) / pages_per_sec if pages_per_sec else None
+        self.view.display_progress(pages_done, total_pages, pages_per_sec, eta)
+
+    def _on_partial_results(self, snapshot):
+        """Preview the top lexemes counted so far (replaced by the full result at the end)."""
+        self._preview_shown = True
+        self.view.update_table(snapshot, self.comments)
+
+    def _restore_table(self):
+        # Drop the preview of an analysis that did not finish
+        if self._preview_shown:
+            self._preview_shown = False
+            self.apply_filters(self.view.search_input.text())
+
+    def _on_processing_finished(self, result):
+        store, word_count, cached, tokenize_seconds = result
+        duration = round(time.time() - self._start_time, 4)
+
+        if self._add_to_project:
+            self.documents.add(self._processing_path, store)
+            if self._index is not None:
+                for lemma, wordforms in store.connections.items():
+                    for wf in wordforms:
+                        self._index.add(lemma, wf)
+        else:
+            self.documents = DocumentSet()
+            self.documents.add(self._processing_path, store)
             self.comments = {}
-
-            self.view.update_table(self.data)
-
-            # This will now display the BOLD results info
-            self.view.display_results_info(duration, word_count)
-
-        except Exception as e:
-            # Error message also in bold
-            self.view.stats_label.setText(f"<b>Error: {str(e)}</b>")
-
-        finally:
-            # We removed the generic "Ready" update here so the timing info stays visible
-            QApplication.processEvents()
+            self._index = None
+        self._frequencies = None
+        self.view.set_documents(list(self.documents.documents))
+
+        self.view.set_processing_state(False)
+        self._shown = None
+        self._preview_shown = False
+        self.view.update_table(self.data, self.comments, self.frequencies)
+        # Every miss added a lemma (worker processes' lemmas are merged in); otherwise the file is current
+        if self.lemma_cache.misses:
+            self.lemma_cache.save()
+
+        # This will now display the BOLD results info
+        cache_stats = None if cached else self.lemma_cache.stats()
+        self.view.display_results_info(duration, word_count, cache_stats, cached,
+                                       self._tokenizer, tokenize_seconds)
+
+    def _on_processing_failed(self, message):
+        self._restore_table()
+        self.view.set_processing_state(False)
+        # Error message also in bold
+        self.view.stats_label.setText(f"<b>Error: {message}</b>")
+
+    def _on_processing_cancelled(self):
+        self._restore_table()
+        self.view.set_processing_state(False)
+        self.view.stats_label.setText("<b>Processing Cancelled</b>")
+
+    def _on_thread_finished(self):
+        self._worker.deleteLater()
+        self._thread.deleteLater()
+        self._worker = None
+        self._thread = None
 
     def handle_add_entry(self, entry_data):
         """Manually add a new lexeme or wordform to the database."""
@@ -75,43 +235,96 @@ class TextProcessorController:
             return
 
         # Update frequency counts and relationships
-        self.data['lexemes'][lex] = self.data['lexemes'].get(lex, 0) + 1
-        if lex not in self.data['connections']:
-            self.data['connections'][lex] = {}
-        self.data['connections'][lex][wf] = self.data['connections'][lex].get(wf, 0) + 1
-
-        self.view.update_table(self.data, self.comments)
+        self.documents.add_entry(lex, wf)
+        if self._index is not None:
+            self._index.add(lex, wf)
+        if self._frequencies is not None:
+            self._frequencies.update_entry(self.data, lex, wf)
+
+        shown = self.data
+        if self._shown is not None:
+            # Filtered table: refresh the counts it shows, add the entry only if it passes the filters
+            shown = self._shown
+            if wf in shown['connections'].get(lex, {}) or self._entry_matches(lex, wf):
+                shown['connections'].setdefault(lex, {})[wf] = self.data['connections'][lex][wf]
+            elif lex not in shown['lexemes']:
+                return
+            shown['lexemes'][lex] = self.data['lexemes'][lex]
+
+        # Only the rows of this lexeme change
+        self.view.update_entry(shown, lex, wf)
+
+    def _entry_matches(self, lexeme, wordform):
+        """Check one (lexeme, wordform) pair against the filters of the shown table."""
+        search_q, adv = self._filters
+        if search_q and search_q not in lexeme and search_q not in wordform:
+            return False
+        if adv:
+            if adv.get('lexeme') and adv['lexeme'].lower() not in lexeme:
+                return False
+            if adv.get('wordform') and adv['wordform'].lower() not in wordform:
+                return False
+            if not adv['lex_min'] <= self.data['lexemes'][lexeme] <= adv['lex_max']:
+                return False
+            if not adv['wf_min'] <= self.data['connections'][lexeme][wordform] <= adv['wf_max']:
+                return False
+        return True
+
+    def handle_comment_changed(self, lexeme, comment):
+        """Store a comment as soon as it is edited in the table."""
+        if comment:
+            self.comments[lexeme] = comment
+        else:
+            self.comments.pop(lexeme, None)
 
     def apply_filters(self, quick_search_query):
         """Apply complex filtering (Quick search + Advanced settings)."""
         search_q = quick_search_query.lower()
         adv = self.view.current_filters
 
+        lexemes = self.data['lexemes']
+        candidates = lexemes.keys()
+
+        # 3. Quick search (substring match) narrows the candidates via the index
+        lexeme_hits = wordform_hits = None
+        if search_q:
+            lexeme_hits, wordform_hits = self.index.quick_search(search_q)
+            candidates = lexeme_hits.union(*(self.index.wordform_lexemes[wf] for wf in wordform_hits))
+
+        adv_wordforms = wf_range = None
+        if adv:
+            if adv.get('lexeme'):
+                candidates = _intersect(candidates, self.index.lexemes.search(adv['lexeme'].lower()))
+            if adv.get('wordform'):
+                adv_wordforms = self.index.wordforms.search(adv['wordform'].lower())
+
+            # 1. Frequency ranges are bisected from the precomputed count orders (None = no limit)
+            lex_range = self.frequencies.lexemes.in_range(adv['lex_min'], adv['lex_max'])
+            if lex_range is not None:
+                candidates = _intersect(candidates, lex_range)
+            wf_range = self.frequencies.wordforms.in_range(adv['wf_min'], adv['wf_max'])
+            if wf_range is not None:
+                candidates = _intersect(candidates, {lemma for lemma, _ in wf_range})
+
         filtered_lexemes = {}
         filtered_conn = {}
 
-        for lexeme, lex_count in self.data['lexemes'].items():
-            # 1. Filter by Lexeme frequency and text
-            if adv:
-                if not (adv['lex_min'] <= lex_count <= adv['lex_max']):
-                    continue
-                if adv.get('lexeme') and adv['lexeme'].lower() not in lexeme:
-                    continue
+        for lexeme in candidates:
+            lex_count = lexemes.get(lexeme, 0)
 
             # Filter associated wordforms
             wordforms = self.data['connections'].get(lexeme, {})
+            lexeme_matches = lexeme_hits is None or lexeme in lexeme_hits
             matching_wfs = {}
 
             for wf, wf_count in wordforms.items():
                 # 2. Check Advanced Filter conditions for wordforms
-                if adv:
-                    if not (adv['wf_min'] <= wf_count <= adv['wf_max']):
-                        continue
-                    if adv.get('wordform') and adv['wordform'].lower() not in wf:
-                        continue
-
-                # 3. Check Quick Search (substring match)
-                if search_q and (search_q not in lexeme and search_q not in wf):
+                if wf_range is not None and (lexeme, wf) not in wf_range:
+                    continue
+                if adv_wordforms is not None and wf not in adv_wordforms:
+                    continue
+
+                if not lexeme_matches and wf not in wordform_hits:
                     continue
 
                 matching_wfs[wf] = wf_count
@@ -121,46 +334,51 @@ class TextProcessorController:
                 filtered_conn[lexeme] = matching_wfs
 
         # Refresh table with filtered results
-        self.view.update_table({
+        self._shown = {
             'lexemes': filtered_lexemes,
             'connections': filtered_conn,
-        }, self.comments)
+        }
+        self._filters = (search_q, adv)
+        self.view.update_table(self._shown, self.comments, self.frequencies)
 
     def save_to_file(self):
-        """Save the current project state to a JSON file."""
-        self._sync_comments_from_view()
-        path, _ = QFileDialog.getSaveFileName(None, "Save Project", "", "JSON Files (*.json)")
+        """Save the current project state as a binary project or a JSON export."""
+        # Comments are already current: edits arrive through comment_changed
+        path, selected_filter = QFileDialog.getSaveFileName(
+            None, "Save Project", "", PROJECT_FILTER + ";;" + JSON_FILTER)
         if path:
-            if not path.lower().endswith('.json'):
-                path += '.json'
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump({'data': self.data, 'comments': self.comments}, f, ensure_ascii=False, indent=4)
+            if not path.lower().endswith((PROJECT_EXTENSION, '.json')):
+                path += '.json' if selected_filter == JSON_FILTER else PROJECT_EXTENSION
+
+            if path.lower().endswith(PROJECT_EXTENSION):
+                save_project(path, self.data, self.comments)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({'data': self.data.to_dict(), 'comments': self.comments}, f,
+                              ensure_ascii=False, indent=4)
 
     def load_from_file(self):
-        """Load project data from a previously saved JSON file."""
-        path, _ = QFileDialog.getOpenFileName(None, "Load Project", "", "JSON Files (*.json)")
+        """Load project data from a binary project or a previously saved JSON file."""
+        path, _ = QFileDialog.getOpenFileName(
+            None, "Load Project", "", f"Projects (*{PROJECT_EXTENSION} *.json);;" + JSON_FILTER)
         if path:
             try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    payload = json.load(f)
-                    self.data = payload.get('data', {})
+                if path.lower().endswith(PROJECT_EXTENSION):
+                    # Mapped, not parsed: counts and strings are read as the table needs them
+                    store, self.comments = load_project(path)
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        payload = json.load(f)
+                    store = LexiconStore.from_dict(payload.get('data', {}))
                     self.comments = payload.get('comments', {})
-                    # English and Bold
-                    self.view.stats_label.setText("<b>Project Loaded Successfully</b>")
-                    self.view.update_table(self.data, self.comments)
+                # Saved projects keep only the merged counts
+                self.documents = DocumentSet(base=store)
+                self.view.set_documents([])
+                self._index = None
+                self._frequencies = None
+                self._shown = None
+                # English and Bold
+                self.view.stats_label.setText("<b>Project Loaded Successfully</b>")
+                self.view.update_table(self.data, self.comments)
             except Exception as e:
                 self.view.stats_label.setText(f"<b>Load Error: {str(e)}</b>")
-
-    def _sync_comments_from_view(self):
-        """Synchronize comments from the table widget back into the controller."""
-        for row in range(self.view.table.rowCount()):
-            # Column 3 is Lexeme
-            lexeme_item = self.view.table.item(row, 3)
-            # Column 0 is Wordform
-            wf_item = self.view.table.item(row, 0)
-            # Column 5 is Comment
-            comment_item = self.view.table.item(row, 5)
-
-            if lexeme_item:
-                lex_text = lexeme_item.text()
-                self.comments[lex_text] = comment_item.text() if comment_item else ""
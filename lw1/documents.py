@@ -0,0 +1,55 @@
+# documents.py
+
+from store import LexiconStore
+
+
+class DocumentSet:
+    """
+    Per-document LexiconStores combined into one aggregate. Adding or removing a
+    document applies only that document's counts as a delta to the aggregate.
+    """
+
+    def __init__(self, base=None):
+        # Document path -> its own counts
+        self.documents = {}
+        # None while the aggregate is just the single document (no copy needed)
+        self._aggregate = base
+
+    @property
+    def aggregate(self):
+        """The merged view used by the table, filters and saving."""
+        if self._aggregate is not None:
+            return self._aggregate
+        if self.documents:
+            return next(iter(self.documents.values()))
+        return LexiconStore()
+
+    def add(self, path, store):
+        """Add a document (replacing an earlier version of the same path)."""
+        if path in self.documents:
+            self.remove(path)
+        if self._aggregate is None and not self.documents:
+            self.documents[path] = store
+            return
+        self._materialize().merge(store)
+        self.documents[path] = store
+
+    def remove(self, path):
+        """Remove a document and subtract its counts from the aggregate."""
+        store = self.documents.pop(path)
+        if self._aggregate is not None:
+            self._aggregate.merge(store, sign=-1)
+
+    def add_entry(self, lemma, wordform):
+        """Record a manual entry; it belongs to the project, not to any document."""
+        aggregate = self._materialize()
+        aggregate.add_lexeme(lemma)
+        aggregate.add_wordform(lemma, wordform)
+
+    def _materialize(self):
+        # The single-document shortcut ends here: the aggregate gets its own copy
+        if self._aggregate is None:
+            self._aggregate = LexiconStore()
+            for store in self.documents.values():
+                self._aggregate.merge(store)
+        return self._aggregate
@@ -0,0 +1,123 @@
+# frequency.py
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+
+class FrequencyTable:
+    """
+    Counts of a set of keys held in arrays (key id -> count), with sort orders
+    precomputed once as permutation arrays of key ids. Single keys can be
+    updated later; they are moved within the orders instead of re-sorting.
+    """
+
+    def __init__(self, counts: dict):
+        self.keys = list(counts)
+        self.counts = array('q', counts.values())
+        self._ids = {key: key_id for key_id, key in enumerate(self.keys)}
+        self._orders = {}
+        self._order_keys = {}
+
+        self.add_order('key', key=lambda key_id: self.keys[key_id])
+        # Ties on frequency fall back to key order
+        self.add_order('count', key=lambda key_id: (self.counts[key_id], self.keys[key_id]))
+        self._sorted_counts = array('q', (self.counts[key_id] for key_id in self._orders['count']))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add_order(self, name, key):
+        """Precompute a permutation of key ids sorted by `key(key_id)`."""
+        self._order_keys[name] = key
+        self._orders[name] = array('q', sorted(range(len(self.keys)), key=key))
+
+    def count_of(self, key, default=0):
+        """Return the count of a key (default if the key is unknown)."""
+        key_id = self._ids.get(key)
+        return default if key_id is None else self.counts[key_id]
+
+    def update(self, counts: dict, moved=()):
+        """
+        Set new counts (adding new keys) and re-place those keys in every order, along
+        with the `moved` keys whose sort keys depend on data that changed elsewhere.
+        All affected keys leave the orders before any is re-inserted, so each
+        bisection runs over a sorted order.
+        """
+        placed = [self._ids[key] for key in moved]
+        for key in counts:
+            if key in self._ids:
+                placed.append(self._ids[key])
+        for key_id in placed:
+            self._remove_from_orders(key_id)
+
+        for key, count in counts.items():
+            key_id = self._ids.get(key)
+            if key_id is None:
+                key_id = len(self.keys)
+                self.keys.append(key)
+                self._ids[key] = key_id
+                self.counts.append(count)
+                placed.append(key_id)
+            else:
+                self.counts[key_id] = count
+
+        for key_id in placed:
+            self._insert_into_orders(key_id)
+
+    def _remove_from_orders(self, key_id):
+        for name, order in self._orders.items():
+            position = order.index(key_id)
+            del order[position]
+            if name == 'count':
+                del self._sorted_counts[position]
+
+    def _insert_into_orders(self, key_id):
+        for name, order in self._orders.items():
+            insort(order, key_id, key=self._order_keys[name])
+            if name == 'count':
+                self._sorted_counts.insert(order.index(key_id), self.counts[key_id])
+
+    def in_range(self, low, high):
+        """
+        Return the set of keys with low <= count <= high (two bisections over the
+        count order), or None when the range covers every key.
+        """
+        start = bisect_left(self._sorted_counts, low)
+        stop = bisect_right(self._sorted_counts, high)
+        if start == 0 and stop == len(self.keys):
+            return None
+
+        keys = self.keys
+        return {keys[key_id] for key_id in self._orders['count'][start:stop]}
+
+    def ordered(self, name, keep, reverse=False):
+        """List the keys in `keep` following the precomputed order `name`."""
+        keys = self.keys
+        order = self._orders[name]
+        if reverse:
+            order = reversed(order)
+        return [keys[key_id] for key_id in order if keys[key_id] in keep]
+
+
+class CorpusFrequencies:
+    """Frequency tables for lexemes and (lexeme, wordform) pairs of one data set."""
+
+    def __init__(self, data):
+        self.lexemes = FrequencyTable(data.get('lexemes', {}))
+        self.wordforms = FrequencyTable({(lemma, wf): count
+                                         for lemma, wfs in data.get('connections', {}).items()
+                                         for wf, count in wfs.items()})
+
+        # Extra row orders used by the results table
+        pairs = self.wordforms.keys
+        self.wordforms.add_order('wordform', key=lambda key_id: (pairs[key_id][1], pairs[key_id][0]))
+        self.wordforms.add_order('lexeme_count',
+                                 key=lambda key_id: (self.lexemes.count_of(pairs[key_id][0]), pairs[key_id]))
+
+    def update_entry(self, data, lemma, wordform):
+        """Take over the new counts of one lexeme and one of its wordforms from `data`."""
+        self.lexemes.update({lemma: data['lexemes'][lemma]})
+        wordforms = data['connections'][lemma]
+        # The lexeme's other wordforms keep their counts but move in the lexeme count order
+        self.wordforms.update({(lemma, wordform): wordforms[wordform]},
+                              moved=[(lemma, wf) for wf in wordforms if wf != wordform])
@@ -1,12 +1,22 @@
 # handler.py
 
-from typing import Any
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any, Iterator
 import fitz
 import nltk
 from nltk.stem import WordNetLemmatizer
 from nltk.corpus import wordnet
-from nltk.tokenize import word_tokenize
+from nltk.tokenize import word_tokenize, sent_tokenize
 from collections import Counter, defaultdict
+from cache import LEMMA_CACHE_SIZE, LemmaCache
+
+# Bump whenever a change alters analysis results, so cached results are not reused
+PIPELINE_VERSION = "2"
 
 # Ensure necessary NLTK resources are downloaded for text processing
 """
@@ -23,66 +33,319 @@ except LookupError:
 """
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract raw text from all pages of a PDF file."""
-    text = ""
+def iter_pdf_pages(pdf_path: str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """Yield the raw text of PDF pages [start, stop) one page at a time."""
     try:
         with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text += page.get_text()
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            for page_no in range(start, stop):
+                yield doc[page_no].get_text()
     except Exception as e:
         print(f"Error extracting PDF: {e}")
-    return text
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF file."""
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """Extract raw text from all pages of a PDF file."""
+    return "".join(iter_pdf_pages(pdf_path))
+
+
+# First letter of a Penn Treebank tag -> WordNet POS (wordnet.ADJ, NOUN, VERB, ADV)
+TAG_TO_WORDNET = {"J": "a", "N": "n", "V": "v", "R": "r"}
+
+
+def penn_to_wordnet(tag: str) -> str:
+    """Map a Penn Treebank tag to WordNet format, defaulting to noun."""
+    return TAG_TO_WORDNET.get(tag[:1].upper(), wordnet.NOUN)
 
 
 def get_wordnet_pos(word):
     """Map POS tag to WordNet format for accurate lemmatization."""
-    tag = nltk.pos_tag([word])[0][1][0].upper()
-    tag_dict = {"J": wordnet.ADJ,
-                "N": wordnet.NOUN,
-                "V": wordnet.VERB,
-                "R": wordnet.ADV}
-    return tag_dict.get(tag, wordnet.NOUN)
+    return penn_to_wordnet(nltk.pos_tag([word])[0][1])
 
 
-def process_text(text: str) -> tuple[dict[str, int], dict[str, Counter[Any]]]:
+_models_lock = threading.Lock()
+_models_loaded = False
+
+
+def load_models():
+    """
+    Load NLTK's lazily loaded models (sentence tokenizer, tagger, WordNet) once.
+    Safe to call from several threads: a background warm-up and the first analysis
+    never load them concurrently.
+    """
+    global _models_loaded
+    with _models_lock:
+        if _models_loaded:
+            return
+        nltk.pos_tag_sents([word_tokenize(sentence) for sentence in sent_tokenize("Models are warming up.")])
+        WordNetLemmatizer().lemmatize("models", wordnet.NOUN)
+        _models_loaded = True
+
+
+# Fast tokenizer: the alphabetic tokens word_tokenize(sentence) would produce, found in one
+# regex pass. Boundaries follow NLTK's splitting rules: characters always split off,
+# ':'/',' before a non-digit, '--', '..', the sentence-final period, and clitics like n't/'s.
+_SPLIT_CHARS = "\\s;@#$%&?!*()\\[\\]{}<>\"`«“‘„»”’‒-―"
+_FINAL_PERIOD = r"\.[\])}>\"'»”’\s]*$"
+_BOUNDARY = r"(?:$|[" + _SPLIT_CHARS + r"]|[:,](?!\d)|--|\.\.|''|" + _FINAL_PERIOD + ")"
+# A quote after 's/'m/'d is split off only before characters NLTK pads earlier
+_QUOTE_BOUNDARY = r"(?:[\s;@#$%&?!‒-―«“‘„`]|[:,](?!\d)|\.\.|" + _FINAL_PERIOD + ")"
+WORD_PATTERN = re.compile(
+    # Start of a token, or an opening quote that does not begin a clitic
+    r"(?:(?<![^" + _SPLIT_CHARS + r":,])|(?<=--)|(?<=\.\.)|(?<=')(?<!\w')(?!(?i:re|ve|ll|m|t|s|d|n)\b))"
+    r"([^\W\d_]+?)"
+    # Clitics split off as tokens of their own, then the end of the token
+    r"(?:(?i:n't|'(?:ll|re|ve))'?(?=" + _BOUNDARY + ")"
+    r"|(?i:'[smd])(?=" + _BOUNDARY + "|'" + _QUOTE_BOUNDARY + ")"
+    r"|'?(?=" + _BOUNDARY + "))")
+# word_tokenize splits these after the third letter (can|not, gon|na, ...)
+SPLIT_WORDS = frozenset(("cannot", "gimme", "gonna", "gotta", "lemme", "wanna"))
+
+
+def fast_word_tokenize(sentence: str) -> list[str]:
+    """Alphabetic words of a sentence, as word_tokenize() filtered by isalpha() would give."""
+    tokens = []
+    for word in WORD_PATTERN.findall(sentence):
+        if word.lower() in SPLIT_WORDS:
+            tokens += (word[:3], word[3:])
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class TextAnalyzer:
+    """
+    Incremental tokenization, lemmatization, and frequency counting.
+    Text is fed chunk by chunk (e.g. page by page); the last, possibly unfinished
+    sentence of each chunk is held back until the next one arrives, so memory
+    is bounded by the vocabulary rather than the document size.
+    With fast_tokenizer, words are found by WORD_PATTERN instead of word_tokenize;
+    batched tagging then sees the words without punctuation tokens.
+    """
+
+    def __init__(self, batched: bool = True, cache: LemmaCache | None = None,
+                 fast_tokenizer: bool = False):
+        load_models()
+        self.batched = batched
+        self.fast_tokenizer = fast_tokenizer
+        # Lemmas are memoized in `cache` (a fresh per-analyzer cache if none is given)
+        self.cache = cache if cache is not None else LemmaCache()
+        self.lemmatizer = WordNetLemmatizer()
+
+        # 1. Counters for lexemes and wordforms
+        self.lexeme_counts = Counter()
+        self.lexeme_to_forms = defaultdict(lambda: Counter())
+        self.word_count = 0
+        # Time spent in word tokenization, shown next to the processing time
+        self.tokenize_seconds = 0.0
+        self._tail = ""
+
+    # A held-back sentence longer than this is counted as is, so text without
+    # sentence-final punctuation is not re-tokenized on every chunk
+    MAX_TAIL_CHARS = 10000
+
+    def feed(self, text: str):
+        """Count all complete sentences of the next chunk of text."""
+        self.word_count += len(text.split())
+        combined = self._tail + text
+        sentences = sent_tokenize(combined)
+        if not sentences:
+            self._tail = ""
+            return
+
+        # The last sentence may continue in the next chunk. It is sliced from the
+        # original text, as punkt strips the trailing newline that separates it
+        # from the next page's first word.
+        last = sentences.pop()
+        self._tail = combined[combined.rfind(last):]
+        if len(self._tail) > self.MAX_TAIL_CHARS:
+            sentences.append(last)
+            self._tail = ""
+        self._count_sentences(sentences)
+
+    def close(self):
+        """Count the held-back tail once the input is exhausted."""
+        if self._tail.strip():
+            self._count_sentences([self._tail.strip()])
+        self._tail = ""
+
+    def result(self) -> tuple[dict[str, int], dict[str, Counter[Any]]]:
+        """Return (lexeme counts, lexeme-to-wordform connections) counted so far."""
+        return dict(self.lexeme_counts), dict(self.lexeme_to_forms)
+
+    def _count_sentences(self, sentences: list[str]):
+        start = time.perf_counter()
+        tokenize = fast_word_tokenize if self.fast_tokenizer else word_tokenize
+        tokenized = [tokenize(sentence) for sentence in sentences]
+        self.tokenize_seconds += time.perf_counter() - start
+
+        if self.batched:
+            # Tag the full token stream (punctuation included) before filtering
+            tagged_words = ((token.lower(), penn_to_wordnet(tag))
+                            for sentence in nltk.pos_tag_sents(tokenized)
+                            for token, tag in sentence if token.isalpha())
+        else:
+            # Tagging a lone word ignores context, so it is memoized with the lemma
+            tagged_words = ((token.lower(), None)
+                            for tokens in tokenized
+                            for token in tokens if token.isalpha())
+
+        for word, pos_type in tagged_words:
+            key = (word, pos_type)
+            lemma = self.cache.get(key)
+            if lemma is None:
+                lemma = self.lemmatizer.lemmatize(word, pos_type or get_wordnet_pos(word))
+                self.cache.put(key, lemma)
+
+            self.lexeme_counts[lemma] += 1
+            self.lexeme_to_forms[lemma][word] += 1
+
+
+def process_text(text: str, batched: bool = True, cache: LemmaCache | None = None,
+                 fast_tokenizer: bool = False) -> tuple[dict[str, int], dict[str, Counter[Any]]]:
     """
     Main text processing: tokenization, lemmatization, and frequency counting.
-    Returns: (lexeme counts, lexeme-to-wordform connections, POS tag map).
+    In batched mode whole sentences are tagged at once, so tags use context;
+    otherwise every word is tagged on its own.
+    Returns: (lexeme counts, lexeme-to-wordform connections).
     """
-    lemmatizer = WordNetLemmatizer()
+    analyzer = TextAnalyzer(batched, cache, fast_tokenizer)
+    analyzer.feed(text)
+    analyzer.close()
+    return analyzer.result()
 
-    # 1. Counters for lexemes and wordforms
-    lexeme_counts = Counter()
-    lexeme_to_forms = defaultdict(lambda: Counter())
 
-    # Tokenization and filtering of non-alphabetic characters
-    tokens = word_tokenize(text)
-    words = [word.lower() for word in tokens if word.isalpha()]
+def analyze_pdf(pdf_path: str, batched: bool = True, cache: LemmaCache | None = None,
+                start: int = 0, stop: int | None = None, fast_tokenizer: bool = False) -> TextAnalyzer:
+    """Stream pages [start, stop) of a PDF through one analyzer, page by page."""
+    analyzer = TextAnalyzer(batched, cache, fast_tokenizer)
+    for page_text in iter_pdf_pages(pdf_path, start, stop):
+        analyzer.feed(page_text)
+    analyzer.close()
+    return analyzer
 
-    for word in words:
-        pos_type = get_wordnet_pos(word)
-        lemma = lemmatizer.lemmatize(word, pos_type)
 
-        lexeme_counts[lemma] += 1
-        lexeme_to_forms[lemma][word] += 1
+# Pages handed to a worker at once; several chunks per worker keep the pool balanced
+PAGES_PER_CHUNK = 25
 
-    return dict(lexeme_counts), dict(lexeme_to_forms)
 
+def split_page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    """Split [0, page_count) into contiguous ranges, a few per worker."""
+    chunk = max(1, min(PAGES_PER_CHUNK, -(-page_count // (workers * 4))))
+    return [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
 
-if __name__ == "__main__":
-    full_text = extract_text_from_pdf("/home/froonn/Harry Potter And The Goblet Of Fire.pdf")
 
-    dict1, dict2 = process_text(full_text)
+# Lemma cache of a worker process, warmed from the on-disk cache by _init_worker
+_worker_cache = None
+
+
+def _init_worker(cache_path: str | None, cache_size: int):
+    global _worker_cache
+    # Workers only read the saved cache; the lemmas they add are sent back to
+    # the parent, which keeps the session cache and writes it to disk
+    _worker_cache = LemmaCache(cache_size, cache_path, track_new=True)
+
+
+def _process_page_range(pdf_path: str, start: int, stop: int, batched: bool,
+                        fast_tokenizer: bool = False) -> tuple[tuple, list, tuple[int, int]]:
+    """
+    Worker task: extract, tokenize and lemmatize one page range. Returns ((lexemes,
+    connections, word count, tokenization seconds), lemmas added to the worker's cache, (hits, misses)).
+    """
+    _worker_cache.reset_stats()
+    analyzer = analyze_pdf(pdf_path, batched, _worker_cache, start, stop, fast_tokenizer)
+    return ((*analyzer.result(), analyzer.word_count, analyzer.tokenize_seconds),
+            _worker_cache.take_new_entries(), (_worker_cache.hits, _worker_cache.misses))
+
+
+class ResultMerger:
+    """
+    Running sum of per-range (lexemes, connections, word_count, tokenize_seconds) results.
+    tokenize_seconds adds up the tokenizer time of all ranges, as one analyzer would count it.
+    """
+
+    def __init__(self):
+        self.lexeme_counts = Counter()
+        self.lexeme_to_forms = defaultdict(lambda: Counter())
+        self.word_count = 0
+        self.tokenize_seconds = 0.0
+
+    def add(self, result):
+        lexemes, connections, words, tokenize_seconds = result
+        self.lexeme_counts.update(lexemes)
+        for lemma, forms in connections.items():
+            self.lexeme_to_forms[lemma].update(forms)
+        self.word_count += words
+        self.tokenize_seconds += tokenize_seconds
+
+    def result(self) -> tuple[dict[str, int], dict[str, Counter[Any]], int]:
+        return dict(self.lexeme_counts), dict(self.lexeme_to_forms), self.word_count
+
+
+def merge_results(results) -> tuple[dict[str, int], dict[str, Counter[Any]], int]:
+    """Merge per-range (lexemes, connections, word_count, tokenize_seconds) results into one."""
+    merger = ResultMerger()
+    for result in results:
+        merger.add(result)
+    return merger.result()
+
+
+def iter_page_range_results(pdf_path: str, workers: int | None = None, batched: bool = True,
+                            fast_tokenizer: bool = False, cache: LemmaCache | None = None
+                            ) -> Iterator[tuple[int, tuple]]:
+    """
+    Analyze a PDF by page ranges across a process pool.
+    Yields (pages in range, (lexemes, connections, word count, tokenization seconds))
+    as ranges complete; closing the generator early drops the ranges that have not
+    started yet.
+    Workers start from the saved copy of `cache`; their new lemmas and hit/miss
+    counts are merged into `cache` as ranges complete.
+    """
+    workers = workers or os.cpu_count() or 1
+    page_count = count_pdf_pages(pdf_path)
+
+    if page_count <= PAGES_PER_CHUNK:
+        # Not worth starting a pool for a short document
+        analyzer = analyze_pdf(pdf_path, batched, cache, 0, page_count, fast_tokenizer)
+        yield page_count, (*analyzer.result(), analyzer.word_count, analyzer.tokenize_seconds)
+        return
+
+    ranges = split_page_ranges(page_count, workers)
+    # "spawn" keeps workers clear of the parent's Qt state
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=get_context("spawn"),
+                               initializer=_init_worker,
+                               initargs=(cache.path, cache.max_size) if cache is not None else (None, LEMMA_CACHE_SIZE))
+    try:
+        futures = {pool.submit(_process_page_range, pdf_path, start, stop, batched, fast_tokenizer): stop - start
+                   for start, stop in ranges}
+        for future in as_completed(futures):
+            result, new_entries, (hits, misses) = future.result()
+            if cache is not None:
+                cache.merge(new_entries)
+                cache.add_stats(hits, misses)
+            yield futures[future], result
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 
-    print("--- Словарь 1 (Лексемы и частота) ---")
-    print(len(dict1))
-    print(dict1)
+def process_pdf_parallel(pdf_path: str, workers: int | None = None, batched: bool = True,
+                         fast_tokenizer: bool = False, cache: LemmaCache | None = None
+                         ) -> tuple[dict[str, int], dict[str, Counter[Any]], int]:
+    """
+    Analyze a PDF by page ranges across a process pool.
+    Returns: (lexeme counts, lexeme-to-wordform connections, word count).
+    """
+    return merge_results(result for _, result in
+                         iter_page_range_results(pdf_path, workers, batched, fast_tokenizer, cache))
 
-    print("\n--- Словарь 2 (Лексема -> Словоформы и их частота) ---")
-    print(len(dict2))
 
-    for lemma, forms in dict2.items():
-        print(f"Лексема '{lemma}':")
-        for form, count in forms.items():
-            print(f"  - {form}: {count}")
+if __name__ == "__main__":
+    # Headless analysis of one or more PDFs; see batch.py for options
+    from batch import main
+    main()
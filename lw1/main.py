@@ -1,12 +1,26 @@
 # main.py
 
+import time
+
+_start_time = time.perf_counter()
+
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from view import MainWindow
 from controller import TextProcessorController
 
+
+def on_window_shown(controller):
+    """Report startup time, then load the heavy NLP modules off the GUI thread."""
+    print(f"Time to window: {time.perf_counter() - _start_time:.3f}s")
+    controller.warm_up()
+
+
 if __name__ == "__main__":
     app = QApplication([])
     view = MainWindow()
     controller = TextProcessorController(view)
     view.show()
+    # Fires once the event loop has processed the first paint
+    QTimer.singleShot(0, lambda: on_window_shown(controller))
     app.exec()
@@ -0,0 +1,211 @@
+# project_format.py
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from store import LexiconStore, StringTable, NO_ID
+
+# Binary project layout (little-endian, every section aligned to 8 bytes):
+#   header: magic, version, string count, lexeme count, wordform count,
+#           string blob size, comments size, typecodes of the array sections
+#   string offsets (strings + 1), LexiconStore.ARRAYS in order, UTF-8 string blob,
+#   comments as JSON
+# Strings are numbered in sorted order, lexemes are stored by lemma and each lexeme's
+# wordforms follow each other sorted by text, so storage order is the table's default order.
+MAGIC = b'LW1P'
+VERSION = 2
+HEADER = struct.Struct('<4sIqqqqq%ds' % (len(LexiconStore.ARRAYS) + 1))
+PROJECT_EXTENSION = '.lwp'
+
+
+class MappedStringTable:
+    """Read-only string table over a mapped project file; strings are decoded on demand."""
+
+    __slots__ = ('_buffer', '_offsets', '_blob_start', '_decoded')
+
+    def __init__(self, buffer, offsets, blob_start):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._blob_start = blob_start
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, string_id):
+        string = self._decoded.get(string_id)
+        if string is None:
+            string = self._bytes(string_id).decode('utf-8')
+            self._decoded[string_id] = string
+        return string
+
+    def id_of(self, string):
+        """Binary search over the ids, which follow string order (UTF-8 byte order = code point order)."""
+        target = string.encode('utf-8')
+        low, high = 0, len(self)
+        while low < high:
+            string_id = (low + high) // 2
+            value = self._bytes(string_id)
+            if value < target:
+                low = string_id + 1
+            elif value > target:
+                high = string_id
+            else:
+                return string_id
+        return None
+
+    def texts(self):
+        """Decode all strings at once; returns a list indexed by string id."""
+        offsets = self._offsets.tolist()
+        blob = self._buffer[self._blob_start:self._blob_start + offsets[-1]]
+        bounds = zip(offsets, offsets[1:])
+        if blob.isascii():
+            # Byte offsets are character offsets, so one decode covers every string
+            text = blob.decode('ascii')
+            return [text[start:stop] for start, stop in bounds]
+        return [blob[start:stop].decode('utf-8') for start, stop in bounds]
+
+    def to_table(self):
+        """Decode everything into a regular StringTable (ids are preserved)."""
+        table = StringTable()
+        for string in self.texts():
+            table.intern(string)
+        return table
+
+    def _bytes(self, string_id):
+        start = self._blob_start + self._offsets[string_id]
+        return self._buffer[start:self._blob_start + self._offsets[string_id + 1]]
+
+
+def _pad(size):
+    return -size % 8
+
+
+def _narrow(typecode, values):
+    """Store non-negative counts and offsets in the smallest unsigned type that holds them."""
+    if typecode != 'q' or not values or min(values) < 0:
+        return array(typecode, values)
+    largest = max(values)
+    for narrow in 'BHI':
+        if largest < 1 << 8 * array(narrow).itemsize:
+            return array(narrow, values)
+    return array(typecode, values)
+
+
+def _sorted_layout(store):
+    """
+    Renumber the store's live strings, lexemes and wordforms into the file's sorted
+    layout. Returns (strings, {array name: values}).
+    """
+    texts = store.strings.texts()
+    lex_string, wf_string = store._lex_string, store._wf_string
+    # Strings are sorted once; lexemes and wordforms are then ordered by integer ranks
+    by_text = sorted(range(len(texts)), key=texts.__getitem__)
+    rank = [0] * len(texts)
+    for position, string_id in enumerate(by_text):
+        rank[string_id] = position
+
+    lexemes = sorted((rank[string_id], lex) for lex, string_id in enumerate(lex_string) if string_id != NO_ID)
+    # (lemma rank, wordform rank, old wordform) in table order, grouped like `lexemes`
+    wordforms = sorted((lemma_rank, rank[wf_string[wf]], wf)
+                       for lemma_rank, lex in lexemes for wf in store._wordforms(lex))
+
+    # Strings no longer used by any lexeme or wordform are dropped
+    used = sorted({lemma_rank for lemma_rank, _ in lexemes} | {wf_rank for _, wf_rank, _ in wordforms})
+    string_of_rank = dict(zip(used, range(len(used))))
+    lexeme_of = [NO_ID] * len(used)
+    first = [NO_ID] * len(lexemes)
+    last = [NO_ID] * len(lexemes)
+    lex_of_rank = {}
+    for lex_index, (lemma_rank, _) in enumerate(lexemes):
+        lexeme_of[string_of_rank[lemma_rank]] = lex_index
+        lex_of_rank[lemma_rank] = lex_index
+
+    wf_next = list(range(1, len(wordforms) + 1))
+    for wf_index, (lemma_rank, _, _) in enumerate(wordforms):
+        lex_index = lex_of_rank[lemma_rank]
+        if first[lex_index] == NO_ID:
+            first[lex_index] = wf_index
+        last[lex_index] = wf_index
+    for wf_index in last:
+        if wf_index != NO_ID:
+            wf_next[wf_index] = NO_ID
+
+    return [texts[by_text[string_rank]] for string_rank in used], {
+        '_lexeme_of': lexeme_of,
+        '_lex_string': [string_of_rank[lemma_rank] for lemma_rank, _ in lexemes],
+        '_lex_count': [store._lex_count[lex] for _, lex in lexemes],
+        '_lex_first': first,
+        '_lex_last': last,
+        '_wf_string': [string_of_rank[wf_rank] for _, wf_rank, _ in wordforms],
+        '_wf_count': [store._wf_count[wf] for _, _, wf in wordforms],
+        '_wf_next': wf_next,
+    }
+
+
+def save_project(path, store, comments):
+    """Write the store and comments in the binary project format (atomic replace)."""
+    texts, arrays = _sorted_layout(store)
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    sections = [_narrow('q', offsets)]
+    sections.extend(_narrow(typecode, arrays[name]) for name, typecode in LexiconStore.ARRAYS)
+    typecodes = ''.join(section.typecode for section in sections).encode('ascii')
+    sections = [section.tobytes() for section in sections]
+    blob = b''.join(encoded)
+    comments_json = json.dumps(comments, ensure_ascii=False).encode('utf-8')
+    sections.extend([blob, comments_json])
+
+    header = HEADER.pack(MAGIC, VERSION, len(encoded), len(arrays['_lex_string']), len(arrays['_wf_string']),
+                         len(blob), len(comments_json), typecodes)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(b'\0' * _pad(len(header)))
+        for section in sections:
+            f.write(section)
+            f.write(b'\0' * _pad(len(section)))
+    os.replace(tmp_path, path)
+
+
+def load_project(path):
+    """
+    Map a binary project file and return (store, comments). Nothing is parsed up
+    front: the store reads counts straight from the mapping and decodes strings
+    as they are displayed.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, n_strings, n_lex, n_wf, blob_size, comments_size, typecodes = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a supported project file")
+    typecodes = iter(typecodes.decode('ascii'))
+
+    view = memoryview(buffer)
+    position = HEADER.size + _pad(HEADER.size)
+
+    def take(count):
+        nonlocal position
+        typecode = next(typecodes)
+        size = count * array(typecode).itemsize
+        section = view[position:position + size].cast(typecode)
+        position += size + _pad(size)
+        return section
+
+    offsets = take(n_strings + 1)
+    lengths = {'_lexeme_of': n_strings, '_wf_string': n_wf, '_wf_count': n_wf, '_wf_next': n_wf}
+    arrays = {name: take(lengths.get(name, n_lex)) for name, _ in LexiconStore.ARRAYS}
+
+    blob_start = position
+    comments_start = blob_start + blob_size + _pad(blob_size)
+    comments = json.loads(buffer[comments_start:comments_start + comments_size].decode('utf-8'))
+
+    strings = MappedStringTable(buffer, offsets, blob_start)
+    return LexiconStore.from_arrays(strings, arrays), comments
@@ -0,0 +1,103 @@
+# search_index.py
+
+from collections import defaultdict
+
+
+class SubstringIndex:
+    """Trigram index over a set of strings, answering 'contains substring' queries."""
+
+    N = 3
+
+    def __init__(self, words=()):
+        self._words = set()
+        self._grams = defaultdict(set)
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, word):
+        """Index one string (no-op if already present)."""
+        if word in self._words:
+            return
+        self._words.add(word)
+        for gram in self._ngrams(word):
+            self._grams[gram].add(word)
+
+    def search(self, query, candidates=None):
+        """Return the set of indexed strings containing `query`, optionally within `candidates`."""
+        if candidates is None:
+            grams = self._ngrams(query)
+            if grams:
+                # Intersect posting lists starting from the rarest trigram
+                postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+                candidates = postings[0].intersection(*postings[1:])
+            else:
+                # Queries shorter than a trigram fall back to a scan
+                candidates = self._words
+
+        return {word for word in candidates if query in word}
+
+    def _ngrams(self, word):
+        return {word[i:i + self.N] for i in range(len(word) - self.N + 1)}
+
+
+class IncrementalSearch:
+    """Remembers the last query so extending it only narrows the previous result set."""
+
+    def __init__(self, index):
+        self.index = index
+        self._last_query = None
+        self._last_result = set()
+
+    def reset(self):
+        """Forget the previous result (call after the index changes)."""
+        self._last_query = None
+        self._last_result = set()
+
+    def search(self, query):
+        # Anything containing the new query also contains the previous one
+        if self._last_query is not None and self._last_query in query:
+            result = self.index.search(query, self._last_result)
+        else:
+            result = self.index.search(query)
+
+        self._last_query = query
+        self._last_result = result
+        return result
+
+
+class LexiconIndex:
+    """Substring indexes over the lexemes and wordforms of a lexeme/connection data set."""
+
+    def __init__(self, data=None):
+        self.lexemes = SubstringIndex()
+        self.wordforms = SubstringIndex()
+        # Wordform -> lexemes it belongs to
+        self.wordform_lexemes = defaultdict(set)
+        self._quick_lexemes = IncrementalSearch(self.lexemes)
+        self._quick_wordforms = IncrementalSearch(self.wordforms)
+
+        if data:
+            for lexeme, wordforms in data.get('connections', {}).items():
+                for wf in wordforms:
+                    self.add(lexeme, wf)
+            for lexeme in data.get('lexemes', {}):
+                self.lexemes.add(lexeme)
+
+    def add(self, lexeme, wordform):
+        """Index a (lexeme, wordform) pair."""
+        self.lexemes.add(lexeme)
+        self.wordforms.add(wordform)
+        self.wordform_lexemes[wordform].add(lexeme)
+        self._quick_lexemes.reset()
+        self._quick_wordforms.reset()
+
+    def quick_search(self, query):
+        """
+        Match the quick-search query against lexemes and wordforms, narrowing the
+        previous result while the user keeps typing.
+        Returns: (matching lexemes, matching wordforms).
+        """
+        return self._quick_lexemes.search(query), self._quick_wordforms.search(query)
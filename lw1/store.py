@@ -0,0 +1,327 @@
+# store.py
+
+import sys
+from array import array
+from collections.abc import Mapping
+
+# Marks "no lexeme" / "end of wordform list" in the index arrays
+NO_ID = -1
+
+
+class StringTable:
+    """Interns strings to dense integer ids (each distinct string is stored once)."""
+
+    __slots__ = ('_strings', '_ids')
+
+    def __init__(self):
+        self._strings = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def id_of(self, string):
+        """Return the id of a string, or None if it was never interned."""
+        return self._ids.get(string)
+
+    def texts(self):
+        """All strings as a list indexed by string id."""
+        return self._strings
+
+    def intern(self, string):
+        """Return the id of a string, adding it to the table if needed."""
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = len(self._strings)
+            string = sys.intern(string)
+            self._strings.append(string)
+            self._ids[string] = string_id
+        return string_id
+
+
+class LexiconStore:
+    """
+    Compact lexeme/wordform counts: strings are interned to ids, counts live in
+    arrays, and each lexeme's wordforms form a linked list inside the arrays.
+    `store['lexemes']` and `store['connections']` are read-only dict-like views
+    matching the old {'lexemes': ..., 'connections': ...} layout.
+    """
+
+    __slots__ = ('strings', '_mapped', '_dead_lexemes', '_lexeme_of',
+                 '_lex_string', '_lex_count', '_lex_first', '_lex_last',
+                 '_wf_string', '_wf_count', '_wf_next',
+                 'lexemes', 'connections')
+
+    # Index/count arrays in storage order (see project_format.py)
+    ARRAYS = (('_lexeme_of', 'i'),
+              ('_lex_string', 'i'), ('_lex_count', 'q'), ('_lex_first', 'i'), ('_lex_last', 'i'),
+              ('_wf_string', 'i'), ('_wf_count', 'q'), ('_wf_next', 'i'))
+
+    def __init__(self):
+        self.strings = StringTable()
+        # True while the arrays are read-only views of a mapped project file
+        self._mapped = False
+        # Lexeme slots whose counts dropped to zero (their string id is set to NO_ID)
+        self._dead_lexemes = 0
+        # String id -> lexeme index (NO_ID if the string is not a lexeme)
+        self._lexeme_of = array('i')
+
+        # Lexeme index -> string id, count, first/last wordform index
+        self._lex_string = array('i')
+        self._lex_count = array('q')
+        self._lex_first = array('i')
+        self._lex_last = array('i')
+
+        # Wordform index -> string id, count, next wordform of the same lexeme
+        self._wf_string = array('i')
+        self._wf_count = array('q')
+        self._wf_next = array('i')
+
+        self.lexemes = LexemeCounts(self)
+        self.connections = Connections(self)
+
+    @classmethod
+    def from_arrays(cls, strings, arrays):
+        """
+        Build a store over existing arrays (e.g. memoryviews of a mapped file)
+        without copying them; they are copied only on the first modification.
+        The arrays must be in the sorted layout written by save_project.
+        """
+        store = cls()
+        store.strings = strings
+        store._mapped = True
+        for name, _ in cls.ARRAYS:
+            setattr(store, name, arrays[name])
+        store._dead_lexemes = sum(1 for string_id in arrays['_lex_string'] if string_id == NO_ID)
+        return store
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a store from {'lexemes': {...}, 'connections': {...}} dicts."""
+        store = cls()
+        for lemma, count in data.get('lexemes', {}).items():
+            store.add_lexeme(lemma, count)
+        for lemma, wordforms in data.get('connections', {}).items():
+            for wf, count in wordforms.items():
+                store.add_wordform(lemma, wf, count)
+        return store
+
+    def to_dict(self):
+        """Return plain dicts (for JSON export)."""
+        return {
+            'lexemes': dict(self.lexemes),
+            'connections': {lemma: dict(wordforms) for lemma, wordforms in self.connections.items()},
+        }
+
+    def sorted_pairs(self):
+        """
+        List all (lemma, wordform) pairs sorted by lemma, then wordform. The pairs are
+        read straight from the arrays, without looking up any string.
+        """
+        texts = self.strings.texts()
+        if self._mapped:
+            # save_project stores the wordforms in this order, each lexeme's in one run
+            lemmas = []
+            for string_id, first, last in zip(self._lex_string, self._lex_first, self._lex_last):
+                if first != NO_ID:
+                    lemmas += [texts[string_id]] * (last - first + 1)
+            return list(zip(lemmas, [texts[string_id] for string_id in self._wf_string]))
+
+        wf_string = self._wf_string
+        pairs = []
+        for lex, string_id in enumerate(self._lex_string):
+            if string_id != NO_ID:
+                lemma = texts[string_id]
+                pairs.extend((lemma, texts[wf_string[wf]]) for wf in self._wordforms(lex))
+        pairs.sort()
+        return pairs
+
+    def __getitem__(self, key):
+        if key == 'lexemes':
+            return self.lexemes
+        if key == 'connections':
+            return self.connections
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def merge(self, other, sign=1):
+        """Add (sign=1) or subtract (sign=-1) all counts of another store."""
+        for lemma, count in other.lexemes.items():
+            self.add_lexeme(lemma, sign * count)
+        for lemma, wordforms in other.connections.items():
+            for wf, count in wordforms.items():
+                self.add_wordform(lemma, wf, sign * count)
+
+    def add_lexeme(self, lemma, count=1):
+        """Add to a lexeme's frequency, creating the lexeme if needed (removed at zero)."""
+        self._ensure_writable()
+        lex = self._lexeme_index(lemma, create=True)
+        self._lex_count[lex] += count
+        self._drop_if_empty(lex)
+
+    def add_wordform(self, lemma, wordform, count=1):
+        """Add to the frequency of a wordform of a lexeme, creating either if needed (removed at zero)."""
+        self._ensure_writable()
+        lex = self._lexeme_index(lemma, create=True)
+        wf = self._wordform_index(lex, wordform)
+        if wf == NO_ID:
+            wf = len(self._wf_string)
+            self._wf_string.append(self.strings.intern(wordform))
+            self._wf_count.append(0)
+            self._wf_next.append(NO_ID)
+            # Append to the end of the lexeme's list to keep insertion order
+            if self._lex_last[lex] == NO_ID:
+                self._lex_first[lex] = wf
+            else:
+                self._wf_next[self._lex_last[lex]] = wf
+            self._lex_last[lex] = wf
+        self._wf_count[wf] += count
+
+        if self._wf_count[wf] <= 0:
+            self._unlink_wordform(lex, wf)
+            self._drop_if_empty(lex)
+
+    def _unlink_wordform(self, lex, wf):
+        prev = NO_ID
+        current = self._lex_first[lex]
+        while current != wf:
+            prev, current = current, self._wf_next[current]
+
+        if prev == NO_ID:
+            self._lex_first[lex] = self._wf_next[wf]
+        else:
+            self._wf_next[prev] = self._wf_next[wf]
+        if self._lex_last[lex] == wf:
+            self._lex_last[lex] = prev
+
+    def _drop_if_empty(self, lex):
+        # A lexeme disappears once its count is zero and it has no wordforms left
+        if self._lex_count[lex] <= 0 and self._lex_first[lex] == NO_ID:
+            self._lexeme_of[self._lex_string[lex]] = NO_ID
+            self._lex_string[lex] = NO_ID
+            self._lex_count[lex] = 0
+            self._dead_lexemes += 1
+
+    def _ensure_writable(self):
+        # Copy mapped data into regular arrays before the first change
+        if not self._mapped:
+            return
+        self.strings = self.strings.to_table()
+        for name, typecode in self.ARRAYS:
+            setattr(self, name, array(typecode, getattr(self, name)))
+        self._mapped = False
+
+    def _lexeme_index(self, lemma, create=False):
+        if create:
+            string_id = self.strings.intern(lemma)
+            if string_id >= len(self._lexeme_of):
+                self._lexeme_of.extend([NO_ID] * (len(self.strings) - len(self._lexeme_of)))
+        else:
+            string_id = self.strings.id_of(lemma)
+            if string_id is None or string_id >= len(self._lexeme_of):
+                return NO_ID
+
+        lex = self._lexeme_of[string_id]
+        if lex == NO_ID and create:
+            lex = len(self._lex_string)
+            self._lexeme_of[string_id] = lex
+            self._lex_string.append(string_id)
+            self._lex_count.append(0)
+            self._lex_first.append(NO_ID)
+            self._lex_last.append(NO_ID)
+        return lex
+
+    def _wordform_index(self, lex, wordform):
+        string_id = self.strings.id_of(wordform)
+        if string_id is None:
+            return NO_ID
+        wf = self._lex_first[lex]
+        while wf != NO_ID and self._wf_string[wf] != string_id:
+            wf = self._wf_next[wf]
+        return wf
+
+    def _wordforms(self, lex):
+        wf = self._lex_first[lex]
+        while wf != NO_ID:
+            yield wf
+            wf = self._wf_next[wf]
+
+
+class LexemeCounts(Mapping):
+    """Read-only lemma -> frequency view of a LexiconStore."""
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, lemma):
+        lex = self._store._lexeme_index(lemma)
+        if lex == NO_ID:
+            raise KeyError(lemma)
+        return self._store._lex_count[lex]
+
+    def __contains__(self, lemma):
+        return self._store._lexeme_index(lemma) != NO_ID
+
+    def __iter__(self):
+        strings = self._store.strings
+        return (strings[string_id] for string_id in self._store._lex_string if string_id != NO_ID)
+
+    def __len__(self):
+        return len(self._store._lex_string) - self._store._dead_lexemes
+
+
+class WordformCounts(Mapping):
+    """Read-only wordform -> frequency view of one lexeme."""
+
+    __slots__ = ('_store', '_lex')
+
+    def __init__(self, store, lex):
+        self._store = store
+        self._lex = lex
+
+    def __getitem__(self, wordform):
+        wf = self._store._wordform_index(self._lex, wordform)
+        if wf == NO_ID:
+            raise KeyError(wordform)
+        return self._store._wf_count[wf]
+
+    def __iter__(self):
+        strings = self._store.strings
+        wf_string = self._store._wf_string
+        return (strings[wf_string[wf]] for wf in self._store._wordforms(self._lex))
+
+    def __len__(self):
+        return sum(1 for _ in self._store._wordforms(self._lex))
+
+
+class Connections(Mapping):
+    """Read-only lemma -> {wordform: frequency} view of a LexiconStore."""
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, lemma):
+        lex = self._store._lexeme_index(lemma)
+        if lex == NO_ID or self._store._lex_first[lex] == NO_ID:
+            raise KeyError(lemma)
+        return WordformCounts(self._store, lex)
+
+    def __iter__(self):
+        store = self._store
+        return (store.strings[store._lex_string[lex]]
+                for lex in range(len(store._lex_string)) if store._lex_first[lex] != NO_ID)
+
+    def __len__(self):
+        return sum(1 for first in self._store._lex_first if first != NO_ID)
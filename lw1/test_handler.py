@@ -0,0 +1,51 @@
+# test_handler.py
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("nltk")
+
+import handler
+
+
+@pytest.fixture(scope="module", autouse=True)
+def models():
+    try:
+        handler.load_models()
+    except LookupError as e:
+        pytest.skip(f"NLTK data is not installed: {e}")
+
+
+def write_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=10)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.mark.parametrize("fast_tokenizer", [False, True])
+def test_streamed_pdf_matches_whole_text(tmp_path, fast_tokenizer):
+    pdf_path = tmp_path / "pages.pdf"
+    # Sentences cross both page breaks
+    write_pdf(pdf_path, ["The wizard walked slowly to the",
+                         "castle gate. The children waited near the old",
+                         "houses until night fell."])
+
+    streamed = handler.analyze_pdf(str(pdf_path), fast_tokenizer=fast_tokenizer).result()
+    whole = handler.process_text(handler.extract_text_from_pdf(str(pdf_path)), fast_tokenizer=fast_tokenizer)
+
+    assert streamed == whole
+    assert "thecastle" not in streamed[0]
+    assert "castle" in streamed[0]
+
+
+def test_tail_without_sentence_end_is_bounded():
+    analyzer = handler.TextAnalyzer()
+    for _ in range(50):
+        analyzer.feed("word " * 500 + "\n")
+        assert len(analyzer._tail) <= analyzer.MAX_TAIL_CHARS
+    analyzer.close()
+
+    assert sum(analyzer.lexeme_counts.values()) == analyzer.word_count == 50 * 500
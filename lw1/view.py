@@ -1,11 +1,202 @@
 # view.py
 
+import os
 import sys
 from PyQt6.QtWidgets import (QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
-                             QWidget, QTableWidget, QTableWidgetItem,
+                             QWidget, QTableView,
                              QLabel, QHeaderView, QMessageBox, QLineEdit,
-                             QDialog, QFormLayout, QFrame, QSpinBox, QComboBox)
-from PyQt6.QtCore import pyqtSignal, Qt
+                             QDialog, QFormLayout, QFrame, QSpinBox, QComboBox, QCheckBox)
+from PyQt6.QtCore import pyqtSignal, Qt, QAbstractTableModel, QModelIndex
+
+
+class LexemeTableModel(QAbstractTableModel):
+    """Table model over lexeme/connection data: one row per (lexeme, wordform) pair."""
+
+    HEADERS = ["Wordform", "WF Freq", "Lexeme", "Lex Freq", "Comment"]
+    COMMENT_COLUMN = 4
+
+    comment_changed = pyqtSignal(str, str)  # lexeme, new comment
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lexemes = {}
+        self._connections = {}
+        self._comments = {}
+        self._frequencies = None
+        # Row order as (lexeme, wordform) keys; cells are read from the dicts on demand
+        self._rows = []
+        self._sort_column = 2
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def set_data(self, data, comments=None, frequencies=None):
+        """
+        Replace the displayed data; only the row index is rebuilt. With `frequencies`
+        (CorpusFrequencies of the full data set) rows follow its precomputed orders.
+        """
+        self.beginResetModel()
+        self._frequencies = frequencies
+        self._lexemes = data.get('lexemes', {})
+        self._connections = data.get('connections', {})
+        self._comments = dict(comments or {})
+        sorted_pairs = getattr(data, 'sorted_pairs', None)
+        if sorted_pairs is None:
+            self._rows = [(lemma, wf) for lemma in self._lexemes for wf in self._connections.get(lemma, {})]
+            self._sort_rows()
+        else:
+            # A LexiconStore lists its rows from its arrays, already in lexeme order
+            self._rows = sorted_pairs()
+            if frequencies is not None or self._sort_column != 2:
+                self._sort_rows()
+            elif self._sort_order == Qt.SortOrder.DescendingOrder:
+                self._rows.reverse()
+        self.endResetModel()
+
+    def row_entry(self, row):
+        """Return (lexeme, wordform, comment) for a row."""
+        lemma, wf = self._rows[row]
+        return lemma, wf, self._comments.get(lemma, "")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        # Only the comment column is editable
+        if index.column() == self.COMMENT_COLUMN:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+
+        lemma, wf = self._rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return wf
+        if column == 1:
+            return str(self._connections[lemma][wf])
+        if column == 2:
+            return lemma
+        if column == 3:
+            return str(self._lexemes[lemma])
+        return self._comments.get(lemma, "")
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or index.column() != self.COMMENT_COLUMN:
+            return False
+
+        lemma, _ = self._rows[index.row()]
+        self._comments[lemma] = value
+        # The comment belongs to the lexeme, so every row of it shows the new text
+        self.dataChanged.emit(self.index(0, self.COMMENT_COLUMN),
+                              self.index(len(self._rows) - 1, self.COMMENT_COLUMN))
+        self.comment_changed.emit(lemma, value)
+        return True
+
+    def update_entry(self, data, lemma, wordform):
+        """
+        Show changed counts of one (lexeme, wordform) pair without resetting the model:
+        the pair's row is inserted or updated and the lexeme's other rows are refreshed.
+        Rows whose sort key changed move to their new position.
+        """
+        self._lexemes = data.get('lexemes', {})
+        self._connections = data.get('connections', {})
+        rows = [(lemma, wf) for wf in self._connections.get(lemma, {})]
+        entry = (lemma, wordform)
+
+        # Counts are sort keys only in the frequency columns
+        if self._sort_column == 3:
+            moved = rows
+        elif self._sort_column == 1:
+            # A wordform hidden by the active filter has no row to move
+            moved = [entry] if entry in rows else []
+        else:
+            moved = []
+
+        placed = list(moved)
+        for row in moved:
+            position = self._find_row(row)
+            if position is not None:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self._rows[position]
+                self.endRemoveRows()
+        if entry not in placed and entry in rows and self._find_row(entry) is None:
+            placed.append(entry)
+
+        for row in placed:
+            position = self._insert_position(row)
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, row)
+            self.endInsertRows()
+
+        last_column = len(self.HEADERS) - 1
+        for row in rows:
+            position = self._find_row(row)
+            if position is not None:
+                self.dataChanged.emit(self.index(position, 0), self.index(position, last_column))
+
+    def _find_row(self, row):
+        try:
+            return self._rows.index(row)
+        except ValueError:
+            return None
+
+    def _insert_position(self, row):
+        # Binary search in the current order (ascending or descending)
+        key = self._sort_key()
+        target = key(row)
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = key(self._rows[middle])
+            if middle_key > target if descending else middle_key < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._sort_rows()
+        self.layoutChanged.emit()
+
+    # Table column -> precomputed row order in CorpusFrequencies.wordforms
+    COLUMN_ORDERS = {0: 'wordform', 1: 'count', 2: 'key', 3: 'lexeme_count'}
+
+    def _sort_key(self):
+        """Row sort key of the current column; ties fall back to lexeme/wordform order."""
+        column = self._sort_column
+        if column == 0:
+            return lambda row: (row[1], row[0])
+        if column == 1:
+            return lambda row: (self._connections[row[0]][row[1]], row)
+        if column == 3:
+            return lambda row: (self._lexemes[row[0]], row)
+        if column == 4:
+            return lambda row: (self._comments.get(row[0], ""), row)
+        return lambda row: row
+
+    def _sort_rows(self):
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        if self._frequencies is not None and self._sort_column in self.COLUMN_ORDERS:
+            self._rows = self._frequencies.wordforms.ordered(
+                self.COLUMN_ORDERS[self._sort_column], set(self._rows), reverse=descending)
+            return
+
+        # Same orders as the precomputed ones (descending is the exact reverse)
+        self._rows.sort(key=self._sort_key(), reverse=descending)
 
 
 class AddEntryDialog(QDialog):
@@ -112,10 +303,14 @@ class MainWindow(QMainWindow):
 
     # Signals to notify the controller of user actions
     open_file_requested = pyqtSignal()
+    add_document_requested = pyqtSignal()
+    remove_document_requested = pyqtSignal(str)
     save_data_requested = pyqtSignal()
     load_data_requested = pyqtSignal()
     add_data_requested = pyqtSignal(dict)
     filter_requested = pyqtSignal(str)
+    cancel_requested = pyqtSignal()
+    comment_changed = pyqtSignal(str, str)
 
     def __init__(self):
         super().__init__()
@@ -134,6 +329,12 @@ class MainWindow(QMainWindow):
         top_bar = QHBoxLayout()
         self.stats_label = QLabel("<b>Waiting for file...</b>")
 
+        # Live quick search over lexemes and wordforms
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Quick search...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.filter_requested.emit)
+
         # Action buttons on the right side of the bar
         self.btn_help = QPushButton("Help")
         self.btn_help.clicked.connect(self._show_help)
@@ -143,14 +344,20 @@ class MainWindow(QMainWindow):
 
         top_bar.addWidget(self.stats_label)
         top_bar.addStretch()
+        top_bar.addWidget(self.search_input)
         top_bar.addWidget(self.btn_help)
         top_bar.addWidget(self.btn_filter_show)
         main_layout.addLayout(top_bar)
 
-        # Results table configuration
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(["Wordform", "WF Freq", "Lexeme", "Lex Freq", "Comment"])
+        # Results table configuration: a view over the model, only visible rows are drawn
+        self.table_model = LexemeTableModel(self)
+        self.table_model.comment_changed.connect(self.comment_changed.emit)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(2, Qt.SortOrder.AscendingOrder)
         main_layout.addWidget(self.table)
 
         # Bottom Bar: functional buttons
@@ -163,11 +370,28 @@ class MainWindow(QMainWindow):
         self.btn_load.clicked.connect(self.load_data_requested.emit)
         self.btn_new = QPushButton("Add Entry")
         self.btn_new.clicked.connect(self._handle_add_entry)
+        self.btn_add_doc = QPushButton("Add PDF to Project")
+        self.btn_add_doc.clicked.connect(self.add_document_requested.emit)
+        self.documents_box = QComboBox()
+        self.documents_box.setMinimumWidth(200)
+        self.btn_remove_doc = QPushButton("Remove Document")
+        self.btn_remove_doc.setEnabled(False)
+        self.btn_remove_doc.clicked.connect(self._handle_remove_document)
+        self.fast_tokenizer_box = QCheckBox("Fast Tokenizer")
+        self.fast_tokenizer_box.setToolTip("Find words with a single regular expression instead of NLTK's tokenizer")
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_requested.emit)
 
         btn_layout.addWidget(self.btn_open)
+        btn_layout.addWidget(self.btn_add_doc)
+        btn_layout.addWidget(self.documents_box)
+        btn_layout.addWidget(self.btn_remove_doc)
         btn_layout.addWidget(self.btn_load)
         btn_layout.addWidget(self.btn_save)
         btn_layout.addWidget(self.btn_new)
+        btn_layout.addWidget(self.fast_tokenizer_box)
+        btn_layout.addWidget(self.btn_cancel)
         main_layout.addLayout(btn_layout)
 
     def _show_help(self):
@@ -176,15 +400,20 @@ class MainWindow(QMainWindow):
             "<b>User Guide: How to use Text Processor 5000 Pro Max Ultra Super</b><br><br>"
             "<b>1. Analyze a Document:</b><br>"
             "Click <b>'Open PDF'</b> to select a file. The system will extract text, "
-            "identify lemmas (dictionary forms), and count frequencies automatically.<br><br>"
+            "identify lemmas (dictionary forms), and count frequencies automatically. "
+            "Use <b>'Add PDF to Project'</b> to combine several documents into one vocabulary; "
+            "<b>'Remove Document'</b> takes the selected one out again. "
+            "Tick <b>'Fast Tokenizer'</b> before opening a PDF for quicker word splitting.<br><br>"
             "<b>2. Manage Data:</b><br>"
             "• <b>Comments:</b> Type directly into the 'Comment' column to add notes.<br>"
             "• <b>Add Entry:</b> Use 'Add Entry' to manually insert words not found in the PDF.<br><br>"
             "<b>3. Filtering:</b><br>"
             "Click <b>'Open Filters'</b> to narrow down results by frequency (e.g., only show "
-            "words appearing more than 10 times) or by wordform.<br><br>"
+            "words appearing more than 10 times) or by wordform. Type into the "
+            "<b>Quick search</b> box to narrow results live as you type.<br><br>"
             "<b>4. Saving Progress:</b><br>"
-            "Click <b>'Save Results'</b> to export your work to a .json file. "
+            "Click <b>'Save Results'</b> to save your work as a compact .lwp project "
+            "(or export it to a .json file). "
             "Use <b>'Load Project'</b> later to continue where you left off."
         )
 
@@ -199,8 +428,8 @@ class MainWindow(QMainWindow):
         dialog = FilterDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.current_filters = dialog.get_filters()
-            # Send empty string as we removed the search input widget
-            self.filter_requested.emit("")
+            # Keep the current quick search applied together with the filters
+            self.filter_requested.emit(self.search_input.text())
 
     def _handle_add_entry(self):
         """Open manual entry dialog and pass data to controller."""
@@ -208,46 +437,59 @@ class MainWindow(QMainWindow):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.add_data_requested.emit(dialog.get_data())
 
+    def _handle_remove_document(self):
+        """Ask the controller to remove the document selected in the combo box."""
+        path = self.documents_box.currentData()
+        if path:
+            self.remove_document_requested.emit(path)
+
+    def set_documents(self, paths):
+        """List the documents of the current project."""
+        self.documents_box.clear()
+        for path in paths:
+            self.documents_box.addItem(os.path.basename(path), path)
+        self.btn_remove_doc.setEnabled(bool(paths))
+
     def set_processing_state(self, is_processing: bool):
         """Visual notification of file processing state."""
 
         self.stats_label.setText("<b>PROCESSING...</b>" if is_processing else "Ready")
-
-    def display_results_info(self, duration, word_count):
-        """Display info about processing duration and word count in bold."""
-        self.stats_label.setText(
-            f"<b>Processing Time: {duration}s | Word Count: {word_count}</b>"
-        )
-
-    def update_table(self, data, comments=None):
-        """Complete redraw of the table based on provided data."""
-        self.table.setRowCount(0)
-        comments = comments or {}
-        lexemes = data.get('lexemes', {})
-        connections = data.get('connections', {})
-
-        row = 0
-
-        # Iterate lexemes and their connections to fill table rows
-        for lemma in sorted(lexemes.keys()):
-            lex_freq = lexemes[lemma]
-            wfs = connections.get(lemma, {})
-            for wf, wf_freq in sorted(wfs.items()):
-                self.table.insertRow(row)
-
-                # 0: Wordform (Static)
-                self.table.setItem(row, 0, QTableWidgetItem(wf))
-
-                # 1: WF Freq (Static)
-                self.table.setItem(row, 1, QTableWidgetItem(str(wf_freq)))
-
-                # 2: Lexeme (Static)
-                self.table.setItem(row, 2, QTableWidgetItem(lemma))
-
-                # 3: Lex Freq (Static)
-                self.table.setItem(row, 3, QTableWidgetItem(str(lex_freq)))
-
-                # 4: Comment (Editable)
-                self.table.setItem(row, 4, QTableWidgetItem(comments.get(lemma, "")))
-
-                row += 1
+        # Starting another analysis or replacing the data mid-run is not allowed
+        self.btn_open.setEnabled(not is_processing)
+        self.btn_add_doc.setEnabled(not is_processing)
+        self.btn_load.setEnabled(not is_processing)
+        # The table may show a preview of the running analysis, not the project data
+        self.btn_new.setEnabled(not is_processing)
+        self.btn_cancel.setEnabled(is_processing)
+
+    def display_progress(self, pages_done, total_pages, pages_per_sec=None, eta=None):
+        """Show per-page progress of the running analysis, with throughput and ETA once known."""
+        info = f"PROCESSING... Page {pages_done}/{total_pages}"
+        if pages_per_sec:
+            info += f" | {pages_per_sec:.1f} pages/s"
+        if eta is not None:
+            info += f" | ETA {eta:.0f}s"
+        self.stats_label.setText(f"<b>{info}</b>")
+
+    def display_results_info(self, duration, word_count, cache_stats=None, cached=False,
+                             tokenizer=None, tokenize_seconds=None):
+        """Display info about processing duration, word count and cache usage in bold."""
+        info = f"Processing Time: {duration}s | Word Count: {word_count}"
+        if cached:
+            info += " | Cached"
+        elif tokenizer:
+            # Tokenization share of the processing time, to compare the tokenizer modes
+            info += f" | Tokenizer: {tokenizer}"
+            if tokenize_seconds is not None:
+                info += f" {tokenize_seconds:.3f}s"
+        if cache_stats:
+            info += f" | Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses"
+        self.stats_label.setText(f"<b>{info}</b>")
+
+    def update_table(self, data, comments=None, frequencies=None):
+        """Show the provided data in the table (rows are rendered lazily by the view)."""
+        self.table_model.set_data(data, comments, frequencies)
+
+    def update_entry(self, data, lemma, wordform):
+        """Refresh only the table rows of one changed (lexeme, wordform) pair."""
+        self.table_model.update_entry(data, lemma, wordform)
@@ -0,0 +1,117 @@
+# worker.py
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from handler import (PIPELINE_VERSION, ResultMerger, TextAnalyzer, count_pdf_pages, iter_pdf_pages,
+                     iter_page_range_results)
+from store import LexiconStore
+
+# Pages between two snapshots of the running counts, and lexemes per snapshot
+SNAPSHOT_PAGES = 10
+SNAPSHOT_LEXEMES = 200
+
+
+def _snapshot(counts):
+    """
+    Top lexemes counted so far (by a TextAnalyzer or ResultMerger) with their
+    wordforms, copied so the GUI thread can use them while counting goes on.
+    """
+    top = counts.lexeme_counts.most_common(SNAPSHOT_LEXEMES)
+    return {
+        'lexemes': dict(top),
+        'connections': {lemma: dict(counts.lexeme_to_forms[lemma]) for lemma, _ in top},
+    }
+
+
+class AnalysisWorker(QObject):
+    """Runs PDF analysis off the GUI thread, reporting per-page progress."""
+
+    progress = pyqtSignal(int, int)  # pages done, total pages
+    partial = pyqtSignal(object)  # {'lexemes': ..., 'connections': ...} of the top lexemes so far
+    finished = pyqtSignal(object)  # (LexiconStore, word count, loaded from cache, tokenization seconds)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_path, cache=None, parallel=False, result_cache=None, fast_tokenizer=False):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.parallel = parallel
+        self.result_cache = result_cache
+        self.fast_tokenizer = fast_tokenizer
+        # Tokenizer time of the run, summed over page ranges in parallel mode
+        self.tokenize_seconds = None
+        self._cancel_requested = False
+
+    def cancel(self):
+        """Ask the running analysis to stop; called directly from the GUI thread."""
+        self._cancel_requested = True
+
+    @pyqtSlot()
+    def run(self):
+        """Entry point, connected to QThread.started."""
+        try:
+            key = None
+            if self.result_cache is not None:
+                # The tokenizer mode changes results, so it is part of the key
+                version = PIPELINE_VERSION + ("-regex" if self.fast_tokenizer else "")
+                key = self.result_cache.key_for(self.file_path, version)
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    self.finished.emit((*cached, True, None))
+                    return
+
+            total_pages = count_pdf_pages(self.file_path)
+            self.progress.emit(0, total_pages)
+
+            if self.parallel:
+                result = self._run_parallel(total_pages)
+            else:
+                result = self._run_sequential(total_pages)
+
+            if result is None:
+                self.cancelled.emit()
+                return
+
+            lexemes, connections, word_count = result
+            store = LexiconStore.from_dict({'lexemes': lexemes, 'connections': connections})
+            if key is not None:
+                self.result_cache.put(key, store, word_count)
+            self.finished.emit((store, word_count, False, self.tokenize_seconds))
+
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _run_sequential(self, total_pages):
+        analyzer = TextAnalyzer(cache=self.cache, fast_tokenizer=self.fast_tokenizer)
+        for page_no, page_text in enumerate(iter_pdf_pages(self.file_path), 1):
+            if self._cancel_requested:
+                return None
+            analyzer.feed(page_text)
+            self.progress.emit(page_no, total_pages)
+            if page_no % SNAPSHOT_PAGES == 0 and page_no < total_pages:
+                self.partial.emit(_snapshot(analyzer))
+        analyzer.close()
+        self.tokenize_seconds = analyzer.tokenize_seconds
+        return *analyzer.result(), analyzer.word_count
+
+    def _run_parallel(self, total_pages):
+        # Ranges are merged as they complete, so snapshots need no extra pass
+        merger = ResultMerger()
+        pages_done = 0
+        next_snapshot = SNAPSHOT_PAGES
+        range_results = iter_page_range_results(self.file_path, fast_tokenizer=self.fast_tokenizer,
+                                                cache=self.cache)
+        try:
+            for range_pages, result in range_results:
+                if self._cancel_requested:
+                    return None
+                merger.add(result)
+                pages_done += range_pages
+                self.progress.emit(pages_done, total_pages)
+                if next_snapshot <= pages_done < total_pages:
+                    self.partial.emit(_snapshot(merger))
+                    next_snapshot = pages_done + SNAPSHOT_PAGES
+        finally:
+            range_results.close()
+        self.tokenize_seconds = merger.tokenize_seconds
+        return merger.result()
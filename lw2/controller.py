@@ -9,6 +9,10 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtTest import QTest
 
+from model import MorphCache
+
+MORPH_CACHE_PATH = "morph_cache.json"
+
 
 def _timed(operation_name):
     """Декоратор для замера времени выполнения операции"""
@@ -26,10 +30,17 @@ def _timed(operation_name):
     return decorator
 
 
+def _rate(count, seconds):
+    """Скорость обработки (единиц в секунду) для строк [PERF]"""
+    return f"{count / seconds:.0f}" if seconds else "—"
+
+
 class CorpusController:
     def __init__(self, model, view):
         self.model = model
         self.view = view
+        self.morph_cache = MorphCache(path=MORPH_CACHE_PATH)
+        self.workers = os.cpu_count() or 1
         self._connect_signals()
         self.update_stats_view()
 
@@ -56,6 +67,8 @@ class CorpusController:
         QTest.qWait(100)
 
         total_start = time.perf_counter()
+        total_tokens = 0
+        self.morph_cache.reset_stats()
         for f_path in files:
             try:
                 t0 = time.perf_counter()
@@ -66,22 +79,33 @@ class CorpusController:
 
                 if text:
                     t2 = time.perf_counter()
-                    self.model.add_to_corpus(text, f_path)
+                    token_count = self.model.add_to_corpus(text, f_path, self.morph_cache, self.workers)
                     t3 = time.perf_counter()
-                    word_count = len(text.split())
+                    total_tokens += token_count
                     print(
-                        f"[PERF] Разметка и сохранение '{os.path.basename(f_path)}' (~{word_count} слов): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс)")
+                        f"[PERF] Разметка и сохранение '{os.path.basename(f_path)}' ({token_count} токенов): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс), {_rate(token_count, t3 - t2)} токенов/с")
+                    self._print_cache_stats()
 
             except Exception as e:
                 QMessageBox.warning(self.view, "Ошибка", f"Файл {f_path} не обработан: {e}")
 
+        self.model.close_pool()
         total_elapsed = time.perf_counter() - total_start
         print(
-            f"[PERF] Загрузка всего ({len(files)} файл(ов)) итого: {total_elapsed:.4f} с ({total_elapsed * 1000:.2f} мс)")
+            f"[PERF] Загрузка всего ({len(files)} файл(ов), {total_tokens} токенов) итого: {total_elapsed:.4f} с ({total_elapsed * 1000:.2f} мс), {_rate(total_tokens, total_elapsed)} токенов/с")
+        self._print_cache_stats("итого")
+        self.morph_cache.save()
 
         self.update_stats_view()
         QMessageBox.information(self.view, "Готово", "Данные сохранены в базу.")
 
+    def _print_cache_stats(self, label="накоплено"):
+        stats = self.morph_cache.stats()
+        saved = stats['saved_seconds']
+        print(
+            f"[PERF] Кэш разборов ({label}): {stats['hit_rate']:.1%} попаданий ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+            f"{stats['size']} записей, сэкономлено ~{saved:.4f} с ({saved * 1000:.2f} мс)")
+
     def handle_manual_add(self):
         context = self.view.add_context_input.toPlainText().strip()
         if not context:
@@ -89,10 +113,9 @@ class CorpusController:
             return
 
         t0 = time.perf_counter()
-        self.model.add_to_corpus(context)
+        token_count = self.model.add_to_corpus(context, cache=self.morph_cache)
         elapsed = time.perf_counter() - t0
-        word_count = len(context.split())
-        print(f"[PERF] Добавление вручную (~{word_count} слов): {elapsed:.4f} с ({elapsed * 1000:.2f} мс)")
+        print(f"[PERF] Добавление вручную ({token_count} токенов): {elapsed:.4f} с ({elapsed * 1000:.2f} мс)")
 
         self.update_stats_view()
         self.view.add_context_input.clear()
@@ -108,7 +131,7 @@ class CorpusController:
             print(f"[PERF] Удаление всех записей: {elapsed:.4f} с ({elapsed * 1000:.2f} мс)")
 
             self.update_stats_view()
-            self.view.results_table.setRowCount(0)
+            self.view.results_model.clear()
             QMessageBox.information(self.view, "Удалено", "База данных полностью очищена.")
 
     def handle_delete_by_filter(self, filter_type):
@@ -130,7 +153,7 @@ class CorpusController:
             f"[PERF] Удаление по {labels.get(filter_type, filter_type)} '{val}': {elapsed:.4f} с ({elapsed * 1000:.2f} мс)")
 
         self.update_stats_view()
-        self.view.results_table.setRowCount(0)
+        self.view.results_model.clear()
         QMessageBox.information(self.view, "Успех", "Операция удаления завершена.")
         self.view.del_input.clear()
 
@@ -177,10 +200,10 @@ class CorpusController:
                 return
 
             t2 = time.perf_counter()
-            self.model.import_json(data)
+            token_count = self.model.import_json(data)
             t3 = time.perf_counter()
             print(
-                f"[PERF] Запись импортированных данных в БД ({len(data)} записей): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс)")
+                f"[PERF] Запись импортированных данных в БД ({len(data)} записей): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс), {_rate(token_count, t3 - t2)} токенов/с")
             print(f"[PERF] Импорт JSON итого: {t3 - t0:.4f} с ({(t3 - t0) * 1000:.2f} мс)")
 
             self.update_stats_view()
@@ -198,33 +221,18 @@ class CorpusController:
             return
 
         t0 = time.perf_counter()
-        results = self.model.search(query=query, tag_filter=tag_filter)
+        cursor = self.model.search_cursor(query=query, tag_filter=tag_filter)
         t1 = time.perf_counter()
         print(
-            f"[PERF] Поиск (запрос='{query}', тег='{tag_filter}') → {len(results)} результатов: {t1 - t0:.4f} с ({(t1 - t0) * 1000:.2f} мс)")
-
-        self.view.results_table.setRowCount(0)
+            f"[PERF] Поиск (запрос='{query}', тег='{tag_filter}'), выбор словоформ: {t1 - t0:.4f} с ({(t1 - t0) * 1000:.2f} мс)")
 
         t2 = time.perf_counter()
-        for row, item in enumerate(results):
-            self.view.results_table.insertRow(row)
-            self.view.results_table.setItem(row, 0, QTableWidgetItem(item.get('word', '')))
-            self.view.results_table.setItem(row, 1, QTableWidgetItem(item.get('lemma', '')))
-            self.view.results_table.setItem(row, 2, QTableWidgetItem(item.get('tags', '')))
-            self.view.results_table.setItem(row, 3, QTableWidgetItem(str(item.get('word_freq', ''))))
-            self.view.results_table.setItem(row, 4, QTableWidgetItem(str(item.get('lemma_freq', ''))))
-
-            word_for_highlight = item.get('word', '') if query else ''
-            highlighted_widget = self.view.create_highlighted_context(
-                item.get('context', ''), word_for_highlight
-            )
-            self.view.results_table.setCellWidget(row, 5, highlighted_widget)
-            self.view.results_table.setItem(row, 6, QTableWidgetItem(item.get('source', '')))
-            self.view.results_table.setRowHeight(row, 65)
+        self.view.results_model.set_cursor(cursor)
         t3 = time.perf_counter()
+        shown = self.view.results_model.rowCount()
         print(
-            f"[PERF] Отрисовка таблицы результатов ({len(results)} строк): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс)")
-        print(f"[PERF] Поиск итого: {t3 - t0:.4f} с ({(t3 - t0) * 1000:.2f} мс)")
+            f"[PERF] Первая страница результатов ({shown} строк): {t3 - t2:.4f} с ({(t3 - t2) * 1000:.2f} мс)")
+        print(f"[PERF] Поиск до первого результата итого: {t3 - t0:.4f} с ({(t3 - t0) * 1000:.2f} мс)")
 
     def update_stats_view(self):
         t0 = time.perf_counter()
@@ -14,6 +14,7 @@ if __name__ == "__main__":
     model = CorpusModel()
     view = CorpusView()
     controller = CorpusController(model, view)
+    app.aboutToQuit.connect(model.close)
 
     view.show()
     sys.exit(app.exec())
@@ -1,10 +1,17 @@
 # --- MODEL ---
 
+import json
+import queue
 import sqlite3
 import os
 import re
+import threading
+import time
 
-from collections import Counter
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
 
 try:
     import docx
@@ -20,17 +27,489 @@ try:
 except ImportError:
     MORPH = None
 
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+WORD_PATTERN = re.compile(r'\b[а-яА-ЯёЁa-zA-Z\'-]+\b')
+
+# Сколько токенов копится в памяти перед записью одним executemany
+BULK_BATCH_SIZE = 50000
+
+# Параллельная разметка: предложений в одной задаче и минимальный размер текста,
+# ради которого стоит отдавать работу процессам
+PARALLEL_BATCH_SENTENCES = 1000
+PARALLEL_MIN_CHARS = 200000
+
+# Соединений только для чтения, которые держит пул
+READ_POOL_SIZE = 4
+# Сколько подготовленных выражений кэширует каждое соединение
+STATEMENT_CACHE_SIZE = 256
+
+# Строк результатов поиска в одной странице
+SEARCH_PAGE_SIZE = 200
+
+# Версия схемы в PRAGMA user_version; 1 — ключи поиска в нижнем регистре,
+# 2 — хранимые частоты словоформ (wordforms.freq)
+SCHEMA_VERSION = 2
+
+
+def normalize_key(text):
+    """Ключ поиска без учёта регистра (LOWER в SQLite не понимает кириллицу)"""
+    return text.lower()
+
+
+class MorphCache:
+    """
+    Ограниченный LRU-кэш разборов pymorphy2: словоформа -> (лемма, часть речи, теги).
+    Общий для всех файлов сессии загрузки, может сохраняться на диск.
+    """
+
+    def __init__(self, max_size=200000, path=None, track_new=False):
+        self.max_size = max_size
+        self.path = path
+        self._entries = OrderedDict()
+        # Новые разборы с последнего take_new_entries (нужны процессам-разметчикам)
+        self._new_entries = [] if track_new else None
+        self.reset_stats()
+
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def analyze(self, word):
+        """Разбор словоформы через кэш"""
+        # pymorphy2 сам приводит слово к нижнему регистру, так что регистр не влияет на разбор
+        key = word.lower()
+        analysis = self._entries.get(key)
+        if analysis is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return analysis
+
+        start = time.perf_counter()
+        analysis = _parse_word(word)
+        self.miss_seconds += time.perf_counter() - start
+        self.misses += 1
+
+        if self._new_entries is not None:
+            self._new_entries.append((key, analysis))
+        self._put(key, analysis)
+        return analysis
+
+    def _put(self, key, analysis):
+        self._entries[key] = analysis
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def take_new_entries(self):
+        """Забрать накопленные новые разборы [(ключ, разбор)]"""
+        entries, self._new_entries = self._new_entries, []
+        return entries
+
+    def merge(self, entries):
+        """Добавить разборы, сделанные в другом процессе (счётчики не меняются)"""
+        for key, analysis in entries:
+            self._put(key, analysis)
+
+    def reset_stats(self):
+        """Обнулить счётчики (записи сохраняются)"""
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+    def add_stats(self, hits, misses, miss_seconds):
+        """Учесть попадания и промахи кэшей процессов-разметчиков"""
+        self.hits += hits
+        self.misses += misses
+        self.miss_seconds += miss_seconds
+
+    def stats(self):
+        """Счётчики для строк [PERF]: доля попаданий и оценка сэкономленного времени"""
+        total = self.hits + self.misses
+        # Каждое попадание экономит в среднем столько, сколько стоит один разбор
+        saved = self.hits * self.miss_seconds / self.misses if self.misses else 0.0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'saved_seconds': saved,
+            'size': len(self._entries),
+        }
+
+    def load(self):
+        """Прогрев кэша с диска; отсутствующий или повреждённый файл оставляет кэш пустым"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                # Записи хранятся от старых к новым, порядок вставки восстанавливает LRU
+                for word, lemma, pos_code, tags in json.load(f):
+                    self._entries[word] = (lemma, pos_code, tags)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка загрузки кэша разборов: {e}")
+            self._entries.clear()
+
+    def save(self):
+        """Запись кэша на диск в порядке LRU (с атомарной заменой файла)"""
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([[word, *analysis] for word, analysis in self._entries.items()],
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Ошибка сохранения кэша разборов: {e}")
+
+
+def _parse_word(word):
+    p = MORPH.parse(word)[0]
+    return p.normal_form, str(p.tag.POS) if p.tag.POS else 'UNKN', str(p.tag)
+
+
+def analyze_word(word, cache=None):
+    """Морфологический разбор словоформы: (лемма, код части речи, строка тегов)"""
+    if cache is not None:
+        return cache.analyze(word)
+    return _parse_word(word)
+
+
+def annotate_sentence(sent, cache=None):
+    """Разметка предложения: [(word, lemma, pos_code, tags)]"""
+    return [(word, *analyze_word(word, cache)) for word in WORD_PATTERN.findall(sent)]
+
+
+def split_sentences(text):
+    for sent in SENTENCE_SPLIT.split(text):
+        sent = sent.strip()
+        if sent:
+            yield sent
+
+
+# Кэш разборов внутри процесса-разметчика
+_worker_cache = None
+
+
+def _init_worker(cache_path, cache_size):
+    global _worker_cache
+    # Процессы только читают сохранённый кэш; новые разборы они возвращают
+    # основному процессу, который и пишет кэш на диск
+    _worker_cache = MorphCache(max_size=cache_size, path=cache_path, track_new=True)
+
+
+def _annotate_batch(sentences):
+    """Задача процесса-разметчика: пачка предложений -> записи, новые разборы и счётчики кэша"""
+    _worker_cache.reset_stats()
+    records = [(sent, annotate_sentence(sent, _worker_cache)) for sent in sentences]
+    return (records, _worker_cache.take_new_entries(),
+            (_worker_cache.hits, _worker_cache.misses, _worker_cache.miss_seconds))
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _ordered_results(pool, func, tasks, window):
+    """Как pool.map, но держит в работе не больше window задач (память не растёт с текстом)"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class BulkWriter:
+    """
+    Пакетная запись размеченных предложений в открытое соединение.
+    Держит в памяти id лемм, словоформ и частей речи, а новые строки копит
+    и пишет через executemany; частоты словоформ (wordforms.freq) растут на
+    число записанных токенов. Карты id лемм и словоформ можно передать
+    извне, чтобы они жили дольше одной загрузки.
+    """
+
+    def __init__(self, conn, lexeme_ids=None, wordform_ids=None, batch_size=BULK_BATCH_SIZE):
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        self.token_count = 0
+
+        self.pos_ids = dict(self.cursor.execute('SELECT code, id FROM pos_types'))
+        self.lexeme_ids = lexeme_ids if lexeme_ids is not None else {}
+        self.wordform_ids = wordform_ids if wordform_ids is not None else {}
+
+        # id новых строк назначаются здесь, чтобы токены можно было копить до записи
+        self._next_ids = {table: self._next_id(table) for table in ('lexemes', 'wordforms', 'sentences')}
+
+        self._lexemes = []
+        self._wordforms = []
+        self._sentences = []
+        self._tokens = []
+
+    def _next_id(self, table):
+        # Не меньше счётчика AUTOINCREMENT, чтобы не переиспользовать id удалённых строк
+        max_id = self.cursor.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+        row = self.cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+        return max(max_id, row[0] if row else 0) + 1
+
+    def _new_id(self, table):
+        new_id = self._next_ids[table]
+        self._next_ids[table] += 1
+        return new_id
+
+    def lexeme_id(self, lemma):
+        lexeme_id = self.lexeme_ids.get(lemma)
+        if lexeme_id is None:
+            row = self.cursor.execute('SELECT id FROM lexemes WHERE lemma = ?', (lemma,)).fetchone()
+            if row:
+                lexeme_id = row[0]
+            else:
+                lexeme_id = self._new_id('lexemes')
+                self._lexemes.append((lexeme_id, lemma, normalize_key(lemma)))
+            self.lexeme_ids[lemma] = lexeme_id
+        return lexeme_id
+
+    def wordform_id(self, lexeme_id, word, pos_code, tags):
+        key = (lexeme_id, word)
+        wordform_id = self.wordform_ids.get(key)
+        if wordform_id is None:
+            row = self.cursor.execute(
+                'SELECT id FROM wordforms WHERE lexeme_id = ? AND word = ?', key
+            ).fetchone()
+            if row:
+                wordform_id = row[0]
+            else:
+                wordform_id = self._new_id('wordforms')
+                self._wordforms.append(
+                    (wordform_id, lexeme_id, word, normalize_key(word), self.pos_ids.get(pos_code), tags)
+                )
+            self.wordform_ids[key] = wordform_id
+        return wordform_id
+
+    def add_sentence(self, source_id, text, analyses, positions=None):
+        """
+        Поставить в очередь предложение и его токены.
+        analyses: [(word, lemma, pos_code, tags)]; позиции по умолчанию — порядковые номера.
+        """
+        sentence_id = self._new_id('sentences')
+        self._sentences.append((sentence_id, source_id, text))
+
+        if positions is None:
+            positions = range(len(analyses))
+        for position, (word, lemma, pos_code, tags) in zip(positions, analyses):
+            wordform_id = self.wordform_id(self.lexeme_id(lemma), word, pos_code, tags)
+            self._tokens.append((sentence_id, wordform_id, position))
+
+        if len(self._tokens) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записать накопленные строки (в порядке внешних ключей)"""
+        cursor = self.cursor
+        if self._lexemes:
+            cursor.executemany('INSERT INTO lexemes (id, lemma, lemma_key) VALUES (?, ?, ?)', self._lexemes)
+        if self._wordforms:
+            cursor.executemany(
+                'INSERT INTO wordforms (id, lexeme_id, word, word_key, pos_id, tags) VALUES (?, ?, ?, ?, ?, ?)',
+                self._wordforms
+            )
+        if self._sentences:
+            cursor.executemany('INSERT INTO sentences (id, source_id, text) VALUES (?, ?, ?)', self._sentences)
+        if self._tokens:
+            cursor.executemany(
+                'INSERT INTO tokens (sentence_id, wordform_id, position) VALUES (?, ?, ?)',
+                self._tokens
+            )
+            freq = Counter(wordform_id for _, wordform_id, _ in self._tokens)
+            cursor.executemany(
+                'UPDATE wordforms SET freq = freq + ? WHERE id = ?',
+                [(count, wordform_id) for wordform_id, count in freq.items()]
+            )
+        self.token_count += len(self._tokens)
+
+        self._lexemes.clear()
+        self._wordforms.clear()
+        self._sentences.clear()
+        self._tokens.clear()
+
+
+class SearchCursor:
+    """
+    Результаты поиска, читаемые страницами по мере надобности.
+    Подходящие словоформы выбираются сразу (их немного), а их токены читаются
+    по ключу (sentence_id, id) через индекс idx_token_wordform_sent, поэтому
+    стоимость страницы не зависит от общего числа совпадений. Частоты берутся
+    из хранимых wordforms.freq, без подсчёта токенов.
+    """
+
+    TOKEN_PAGE_SQL = '''
+                     SELECT t.sentence_id,
+                            t.id,
+                            s.text        AS context,
+                            src.file_name AS source
+                     FROM tokens t
+                              JOIN sentences s ON t.sentence_id = s.id
+                              JOIN sources src ON s.source_id = src.id
+                     WHERE t.wordform_id = ?
+                       AND (t.sentence_id, t.id) > (?, ?)
+                     ORDER BY t.sentence_id, t.id
+                     LIMIT ?
+                     '''
+
+    def __init__(self, read, wordforms, highlight=False):
+        # read — контекстный менеджер, выдающий соединение для чтения;
+        # wordforms — [(wf_id, lexeme_id, word, lemma, tags, freq)] в порядке выдачи;
+        # highlight — искать ли словоформу в контексте (смещения для подсветки)
+        self._read = read
+        self._wordforms = wordforms
+        self._highlight = highlight
+        self._index = 0
+        self._after = (0, 0)
+        # Частота леммы среди найденного — сумма частот её найденных словоформ
+        self._lemma_freq = Counter()
+        for _, lexeme_id, _, _, _, freq in wordforms:
+            self._lemma_freq[lexeme_id] += freq
+
+    @property
+    def exhausted(self):
+        return self._index >= len(self._wordforms)
+
+    def fetch(self, limit=SEARCH_PAGE_SIZE):
+        """Следующая страница результатов (не больше limit строк)"""
+        rows = []
+        with self._read() as conn:
+            while len(rows) < limit and not self.exhausted:
+                wf_id, lexeme_id, word, lemma, tags, word_freq = self._wordforms[self._index]
+                lemma_freq = self._lemma_freq[lexeme_id]
+                wanted = limit - len(rows)
+                page = conn.execute(self.TOKEN_PAGE_SQL, (wf_id, *self._after, wanted)).fetchall()
+
+                if page:
+                    pattern = re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE) if self._highlight else None
+                for sentence_id, token_id, context, source in page:
+                    match = pattern.search(context) if pattern else None
+                    rows.append({
+                        'word': word,
+                        'lemma': lemma,
+                        'tags': tags,
+                        'context': context,
+                        'source': source,
+                        'word_freq': word_freq,
+                        'lemma_freq': lemma_freq,
+                        # (начало, конец) словоформы в контексте или None
+                        'match_span': match.span() if match else None,
+                    })
+
+                if len(page) < wanted:
+                    self._index += 1
+                    self._after = (0, 0)
+                else:
+                    self._after = page[-1][:2]
+        return rows
+
+    def __iter__(self):
+        while not self.exhausted:
+            yield from self.fetch()
+
 
 class CorpusModel:
     def __init__(self, db_path="corpus.db"):
         self.db_path = db_path
+        self._pool = None
+        self._pool_workers = 0
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._readers = queue.LifoQueue()
+        # Карты id лемм и словоформ, общие для всех загрузок (меняются только под _write)
+        self._lexeme_ids = {}
+        self._wordform_ids = {}
         self._init_db()
 
+    def _connect(self, read_only=False):
+        """Новое соединение; настройки применяются один раз на всё время его жизни"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        else:
+            # WAL сохраняется в файле БД: читатели не блокируют запись.
+            # При NORMAL fsync выполняется только на контрольных точках;
+            # сбой питания может потерять последнюю транзакцию, но не испортит БД
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('PRAGMA cache_size = -65536')
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Единственное пишущее соединение; транзакция фиксируется при выходе (откатывается при ошибке)"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def _bulk_write(self):
+        """BulkWriter на пишущем соединении; недописанные строки записываются при выходе"""
+        with self._write() as conn:
+            writer = BulkWriter(conn, self._lexeme_ids, self._wordform_ids)
+            try:
+                yield writer
+                writer.flush()
+            except BaseException:
+                # Транзакция откатится, и id новых строк в картах окажутся недействительными
+                self._reset_id_maps()
+                raise
+
+    def _reset_id_maps(self):
+        self._lexeme_ids.clear()
+        self._wordform_ids.clear()
+
+    @contextmanager
+    def _read(self):
+        """Соединение из пула читателей"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect(read_only=True)
+        try:
+            yield conn
+        finally:
+            if self._readers.qsize() < READ_POOL_SIZE:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def close(self):
+        """Закрыть соединения и остановить процессы-разметчики"""
+        self.close_pool()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
     def _init_db(self):
         """Инициализация базы данных SQLite"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write() as conn:
             cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
 
             # Справочник частей речи
             cursor.execute('''
@@ -94,8 +573,9 @@ class CorpusModel:
             cursor.execute('''
                            CREATE TABLE IF NOT EXISTS lexemes
                            (
-                               id    INTEGER PRIMARY KEY AUTOINCREMENT,
-                               lemma TEXT NOT NULL UNIQUE
+                               id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                               lemma     TEXT NOT NULL UNIQUE,
+                               lemma_key TEXT
                            )
                            ''')
 
@@ -106,8 +586,10 @@ class CorpusModel:
                                id        INTEGER PRIMARY KEY AUTOINCREMENT,
                                lexeme_id INTEGER NOT NULL,
                                word      TEXT    NOT NULL,
+                               word_key  TEXT,
                                pos_id    INTEGER,
                                tags      TEXT,
+                               freq      INTEGER NOT NULL DEFAULT 0,
 
                                UNIQUE (lexeme_id, word),
                                FOREIGN KEY (pos_id) REFERENCES pos_types (id),
@@ -129,13 +611,48 @@ class CorpusModel:
                            )
                            ''')
 
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_sentence  ON tokens(sentence_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_wordform  ON tokens(wordform_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_wordform_word   ON wordforms(word)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_wordform_lexeme ON wordforms(lexeme_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lexeme_lemma    ON lexemes(lemma)')
+            self._migrate(cursor)
+
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_sentence      ON tokens(sentence_id)')
+            # Покрывающий индекс для поиска: токены словоформы вместе с их предложениями
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_wordform_sent ON tokens(wordform_id, sentence_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_wordform_word       ON wordforms(word)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_wordform_word_key   ON wordforms(word_key)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_wordform_lexeme     ON wordforms(lexeme_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lexeme_lemma        ON lexemes(lemma)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lexeme_lemma_key    ON lexemes(lemma_key)')
+
+    def _migrate(self, cursor):
+        """Обновление схемы БД, созданной прежними версиями программы"""
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
 
-            conn.commit()
+        if version < 1:
+            # Ключи в нижнем регистре считаются в Python и заполняются для уже загруженных данных
+            for table, column, source in (('lexemes', 'lemma_key', 'lemma'), ('wordforms', 'word_key', 'word')):
+                columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+                if column not in columns:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} TEXT')
+                rows = cursor.execute(f'SELECT id, {source} FROM {table} WHERE {column} IS NULL').fetchall()
+                cursor.executemany(
+                    f'UPDATE {table} SET {column} = ? WHERE id = ?',
+                    [(normalize_key(value), row_id) for row_id, value in rows]
+                )
+            # Индекс tokens(wordform_id) поглощён покрывающим idx_token_wordform_sent
+            cursor.execute('DROP INDEX IF EXISTS idx_token_wordform')
+
+        if version < 2:
+            # Частоты словоформ считаются один раз по уже загруженным токенам
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(wordforms)')]
+            if 'freq' not in columns:
+                cursor.execute('ALTER TABLE wordforms ADD COLUMN freq INTEGER NOT NULL DEFAULT 0')
+            cursor.execute('''
+                           UPDATE wordforms
+                           SET freq = (SELECT COUNT(*) FROM tokens WHERE tokens.wordform_id = wordforms.id)
+                           ''')
+
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
 
     def extract_text(self, file_path=None):
         """Извлечение текста из файлов различных форматов"""
@@ -168,131 +685,119 @@ class CorpusModel:
 
         return text
 
-    def _get_or_create_lexeme(self, cursor, lemma):
-        """Получить или создать лексему, вернуть её id"""
-        cursor.execute('SELECT id FROM lexemes WHERE lemma = ?', (lemma,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-
-        cursor.execute(
-            'INSERT INTO lexemes (lemma) VALUES (?)',
-            (lemma,))
-        return cursor.lastrowid
-
-    def _get_or_create_wordform(self, cursor, lexeme_id, word, pos_code, tags):
-        """Получить или создать словоформу, вернуть её id"""
-        cursor.execute(
-            'SELECT id FROM wordforms WHERE lexeme_id = ? AND word = ?',
-            (lexeme_id, word)
-        )
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-
-        cursor.execute('SELECT id FROM pos_types WHERE code = ?', (pos_code,))
-        pos_row = cursor.fetchone()
-        pos_id = pos_row[0] if pos_row else None
-
-        cursor.execute(
-            'INSERT INTO wordforms (lexeme_id, word, pos_id, tags) VALUES (?, ?, ?, ?)',
-            (lexeme_id, word, pos_id, tags)
-        )
-        return cursor.lastrowid
-
-    def add_to_corpus(self, text, source=None):
-        """Лингвистическая разметка текста и сохранение в БД"""
+    def add_to_corpus(self, text, source=None, cache=None, workers=1):
+        """
+        Лингвистическая разметка текста и сохранение в БД; возвращает число токенов.
+        cache — необязательный MorphCache, общий для нескольких вызовов.
+        При workers > 1 большой текст размечается в процессах, а в БД пишет только
+        текущий процесс, в исходном порядке предложений.
+        """
         if not MORPH:
-            return
+            return 0
 
         file_name = os.path.basename(source) if source else "unknown"
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
-
-            cursor.execute(
+        with self._bulk_write() as writer:
+            writer.cursor.execute(
                 'INSERT INTO sources (file_path, file_name) VALUES (?, ?)',
                 (source, file_name)
             )
-            source_id = cursor.lastrowid
+            source_id = writer.cursor.lastrowid
 
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            for sent, analyses in self._annotate(text, cache, workers):
+                writer.add_sentence(source_id, sent, analyses)
 
-            for sent in sentences:
-                sent = sent.strip()
-                if not sent:
-                    continue
-
-                cursor.execute(
-                    'INSERT INTO sentences (source_id, text) VALUES (?, ?)',
-                    (source_id, sent)
-                )
-                sentence_id = cursor.lastrowid
+        return writer.token_count
 
-                words = re.findall(r'\b[а-яА-ЯёЁa-zA-Z\'-]+\b', sent)
-                for pos_in_sent, word in enumerate(words):
-                    p = MORPH.parse(word)[0]
-                    lemma = p.normal_form
-                    pos_code = str(p.tag.POS) if p.tag.POS else 'UNKN'
-                    tags = str(p.tag)
-
-                    lexeme_id = self._get_or_create_lexeme(cursor, lemma)
-                    wordform_id = self._get_or_create_wordform(cursor, lexeme_id, word, pos_code, tags)
+    def _annotate(self, text, cache, workers):
+        """Размеченные предложения текста по порядку"""
+        sentences = split_sentences(text)
+        if workers <= 1 or len(text) < PARALLEL_MIN_CHARS:
+            for sent in sentences:
+                yield sent, annotate_sentence(sent, cache)
+            return
 
-                    cursor.execute(
-                        'INSERT INTO tokens (sentence_id, wordform_id, position) VALUES (?, ?, ?)',
-                        (sentence_id, wordform_id, pos_in_sent)
-                    )
+        pool = self._get_pool(workers, cache)
+        batches = _batches(sentences, PARALLEL_BATCH_SENTENCES)
+        for records, new_entries, cache_stats in _ordered_results(pool, _annotate_batch, batches, workers * 2):
+            if cache is not None:
+                cache.merge(new_entries)
+                cache.add_stats(*cache_stats)
+            yield from records
+
+    def _get_pool(self, workers, cache):
+        """Пул процессов-разметчиков; живёт до close_pool, чтобы словари pymorphy2 грузились один раз"""
+        if self._pool is None or self._pool_workers != workers:
+            self.close_pool()
+            # "spawn": fork из процесса с Qt небезопасен
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(cache.path if cache is not None else None,
+                          cache.max_size if cache is not None else 200000),
+            )
+            self._pool_workers = workers
+        return self._pool
 
-            conn.commit()
+    def close_pool(self):
+        """Остановить процессы-разметчики"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = 0
 
     def delete_all(self):
         """Полная очистка БД"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write() as conn:
             cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
             cursor.execute('DELETE FROM tokens')
             cursor.execute('DELETE FROM wordforms')
             cursor.execute('DELETE FROM lexemes')
             cursor.execute('DELETE FROM sentences')
             cursor.execute('DELETE FROM sources')
-            conn.commit()
+            self._reset_id_maps()
 
     def delete_by_word(self, word):
         """Удаление токенов по точному совпадению словоформы"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write() as conn:
             cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
+            cursor.execute('UPDATE wordforms SET freq = 0 WHERE word_key = ?', (normalize_key(word),))
             cursor.execute('''
                            DELETE
                            FROM tokens
                            WHERE wordform_id IN (SELECT id
                                                  FROM wordforms
-                                                 WHERE LOWER(word) = ?)
-                           ''', (word.lower(),))
-            conn.commit()
+                                                 WHERE word_key = ?)
+                           ''', (normalize_key(word),))
 
     def delete_by_lemma(self, lemma):
         """Удаление токенов по лемме"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write() as conn:
             cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
+            cursor.execute('''
+                           UPDATE wordforms
+                           SET freq = 0
+                           WHERE lexeme_id IN (SELECT id FROM lexemes WHERE lemma_key = ?)
+                           ''', (normalize_key(lemma),))
             cursor.execute('''
                            DELETE
                            FROM tokens
                            WHERE wordform_id IN (SELECT wf.id
                                                  FROM wordforms wf
                                                           JOIN lexemes lx ON wf.lexeme_id = lx.id
-                                                 WHERE LOWER(lx.lemma) = ?)
-                           ''', (lemma.lower(),))
-            conn.commit()
+                                                 WHERE lx.lemma_key = ?)
+                           ''', (normalize_key(lemma),))
 
     def delete_by_pos(self, pos):
         """Удаление токенов по части речи"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write() as conn:
             cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
+            cursor.execute('''
+                           UPDATE wordforms
+                           SET freq = 0
+                           WHERE pos_id IN (SELECT id FROM pos_types WHERE code = ?)
+                           ''', (pos.upper(),))
             cursor.execute('''
                            DELETE
                            FROM tokens
@@ -302,54 +807,75 @@ class CorpusModel:
                                                           JOIN pos_types pt ON wf.pos_id = pt.id
                                                  WHERE pt.code = ?)
                            ''', (pos.upper(),))
-            conn.commit()
-
-    def search(self, query=None, tag_filter=None):
-        """Поиск по словоформе, лемме или тегам"""
-
-        query = query.lower() if query else None
-        tag_filter = tag_filter.upper() if tag_filter else None
 
+    def _search_sql(self, query=None, tag_filter=None):
+        """SQL и параметры выбора словоформ, подходящих под запрос"""
         sql = '''
-              SELECT wf.word,
+              SELECT wf.id,
+                     wf.lexeme_id,
+                     wf.word,
                      lx.lemma,
-                     wf.tags                               AS tags,
-                     s.text                                AS context,
-                     src.file_name                         AS source,
-                     COUNT(t.id) OVER (PARTITION BY wf.id) AS word_freq,
-                     COUNT(t.id) OVER (PARTITION BY lx.id) AS lemma_freq
-              FROM tokens t
-                       JOIN wordforms wf ON t.wordform_id = wf.id
+                     wf.tags,
+                     wf.freq
+              FROM wordforms wf
                        JOIN lexemes lx ON wf.lexeme_id = lx.id
-                       LEFT JOIN pos_types pt ON wf.pos_id = pt.id
-                       JOIN sentences s ON t.sentence_id = s.id
-                       JOIN sources src ON s.source_id = src.id
               '''
 
         conditions = []
         params = []
 
         if query:
-            conditions.append("(LOWER(wf.word) = ? OR LOWER(lx.lemma) = ?)")
-            params.extend([query, query])
+            # Оба условия — поиск по индексам ключей; OR между двумя таблицами дал бы перебор
+            conditions.append('''wf.id IN (SELECT id
+                                          FROM wordforms
+                                          WHERE word_key = ?
+                                          UNION
+                                          SELECT wf2.id
+                                          FROM lexemes lx2
+                                                   JOIN wordforms wf2 ON wf2.lexeme_id = lx2.id
+                                          WHERE lx2.lemma_key = ?)''')
+            key = normalize_key(query)
+            params.extend([key, key])
 
         if tag_filter:
             conditions.append("wf.tags LIKE ?")
-            params.append(f"%{tag_filter}%")
+            params.append(f"%{tag_filter.upper()}%")
 
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
+        sql += " ORDER BY wf.lexeme_id, wf.id"
+        return sql, params
 
-            return [dict(row) for row in cursor.fetchall()]
+    def search_cursor(self, query=None, tag_filter=None):
+        """Поиск по словоформе, лемме или тегам; результаты читаются страницами (SearchCursor)"""
+        sql, params = self._search_sql(query, tag_filter)
+
+        with self._read() as conn:
+            wordforms = conn.execute(sql, params).fetchall()
+
+        return SearchCursor(self._read, wordforms, highlight=bool(query))
+
+    def search(self, query=None, tag_filter=None):
+        """Поиск по словоформе, лемме или тегам (все результаты сразу)"""
+        return list(self.search_cursor(query, tag_filter))
+
+    def explain_search(self, query=None, tag_filter=None):
+        """
+        Планы выполнения поиска (EXPLAIN QUERY PLAN): выбор словоформ и чтение
+        страницы токенов — для проверки, что обе части идут по индексам
+        """
+        sql, params = self._search_sql(query, tag_filter)
+
+        with self._read() as conn:
+            plan = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+            plan += [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + SearchCursor.TOKEN_PAGE_SQL,
+                                                     (0, 0, 0, SEARCH_PAGE_SIZE))]
+        return plan
 
     def get_stats(self):
         """Получение статистики из БД"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._read() as conn:
             cursor = conn.cursor()
 
             cursor.execute('SELECT COUNT(*) FROM tokens')
@@ -381,9 +907,9 @@ class CorpusModel:
 
     def export_json(self):
         """Экспорт всех данных корпуса в виде списка записей"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._read() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute('''
                            SELECT src.file_path AS source_path,
                                   src.file_name AS source_name,
@@ -408,21 +934,20 @@ class CorpusModel:
         Импорт данных из списка записей JSON.
         Каждая запись: {source_path, source_name, sentence, word, lemma, pos, tags, position}
         Существующие данные не удаляются — записи добавляются поверх.
+        Возвращает число записанных токенов.
         """
         if not records:
-            return
+            return 0
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('PRAGMA foreign_keys = ON')
-
-            # Группируем токены по (source_name, sentence)
-            from collections import defaultdict
-            groups = defaultdict(list)
-            for rec in records:
-                key = (rec.get('source_path'), rec.get('source_name', 'unknown'), rec.get('sentence', ''))
-                groups[key].append(rec)
+        # Группируем токены по (source_name, sentence)
+        from collections import defaultdict
+        groups = defaultdict(list)
+        for rec in records:
+            key = (rec.get('source_path'), rec.get('source_name', 'unknown'), rec.get('sentence', ''))
+            groups[key].append(rec)
 
+        with self._bulk_write() as writer:
+            cursor = writer.cursor
             for (source_path, source_name, sentence_text), tokens in groups.items():
                 # Источник
                 cursor.execute(
@@ -431,25 +956,12 @@ class CorpusModel:
                 )
                 source_id = cursor.lastrowid
 
-                # Предложение
-                cursor.execute(
-                    'INSERT INTO sentences (source_id, text) VALUES (?, ?)',
-                    (source_id, sentence_text)
-                )
-                sentence_id = cursor.lastrowid
-
-                for rec in sorted(tokens, key=lambda r: r.get('position', 0)):
-                    word = rec.get('word', '')
-                    lemma = rec.get('lemma', '')
-                    pos = rec.get('pos', 'UNKN')
-                    tags = rec.get('tags', '')
-
-                    lexeme_id = self._get_or_create_lexeme(cursor, lemma)
-                    wordform_id = self._get_or_create_wordform(cursor, lexeme_id, word, pos, tags)
-
-                    cursor.execute(
-                        'INSERT INTO tokens (sentence_id, wordform_id, position) VALUES (?, ?, ?)',
-                        (sentence_id, wordform_id, rec.get('position', 0))
-                    )
+                tokens = sorted(tokens, key=lambda r: r.get('position', 0))
+                analyses = [
+                    (rec.get('word', ''), rec.get('lemma', ''), rec.get('pos', 'UNKN'), rec.get('tags', ''))
+                    for rec in tokens
+                ]
+                writer.add_sentence(source_id, sentence_text, analyses,
+                                    positions=[rec.get('position', 0) for rec in tokens])
 
-            conn.commit()
+        return writer.token_count
@@ -0,0 +1,111 @@
+# Проверки того, что поиск по словоформе и лемме идёт по индексам
+
+import sqlite3
+
+import pytest
+
+from model import CorpusModel
+
+
+def make_records(count=5000):
+    """Записи в формате import_json: 300 словоформ 100 лемм, предложения по 10 токенов"""
+    return [
+        {
+            'source_path': 'a.txt',
+            'source_name': 'a.txt',
+            'sentence': f'Предложение {i // 10}',
+            'word': f'Слово{i % 300}',
+            'lemma': f'слово{i % 100}',
+            'pos': 'NOUN',
+            'tags': 'NOUN,inan,masc sing,nomn',
+            'position': i % 10,
+        }
+        for i in range(count)
+    ]
+
+
+def assert_freq_matches_tokens(model):
+    with model._read() as conn:
+        stale = conn.execute('''
+            SELECT word, freq FROM wordforms
+            WHERE freq != (SELECT COUNT(*) FROM tokens WHERE tokens.wordform_id = wordforms.id)
+        ''').fetchall()
+    assert not stale
+
+
+def assert_index_driven(plan):
+    assert plan
+    scans = [step for step in plan if step.startswith('SCAN')]
+    assert not scans, "\n".join(plan)
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = CorpusModel(str(tmp_path / 'corpus.db'))
+    model.import_json(make_records())
+    yield model
+    model.close()
+
+
+@pytest.mark.parametrize('query, tag_filter', [
+    ('слово1', None),
+    ('СЛОВО1', None),
+    ('слово1', 'NOUN'),
+])
+def test_search_plan_uses_indexes(model, query, tag_filter):
+    assert_index_driven(model.explain_search(query, tag_filter))
+
+
+def test_search_ignores_cyrillic_case(model):
+    # 'Слово1' — словоформа, 'слово1' — лемма словоформ Слово1, Слово101, Слово201
+    assert {row['word'] for row in model.search('СЛОВО1')} == {'Слово1', 'Слово101', 'Слово201'}
+
+
+def test_search_frequencies_are_stored(model):
+    rows = model.search('слово1')
+    # 5000 токенов по кругу из 300 словоформ; у леммы слово1 — 50 токенов
+    assert {(row['word'], row['word_freq'], row['lemma_freq']) for row in rows} == {
+        ('Слово1', 17, 50), ('Слово101', 17, 50), ('Слово201', 16, 50)}
+
+
+def test_stored_frequencies_follow_changes(model):
+    assert_freq_matches_tokens(model)
+    model.import_json(make_records(600))
+    assert_freq_matches_tokens(model)
+    model.delete_by_word('СЛОВО2')
+    model.delete_by_lemma('слово3')
+    assert_freq_matches_tokens(model)
+    assert [row['word_freq'] for row in model.search('слово1')][:1] == [19]
+    model.delete_by_pos('noun')
+    assert_freq_matches_tokens(model)
+
+
+def test_migrated_database_search_uses_indexes(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    # Схема до появления ключей поиска (user_version = 0)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript('''
+            CREATE TABLE pos_types (id INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT NOT NULL UNIQUE, name TEXT);
+            CREATE TABLE sources (id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT, file_name TEXT NOT NULL);
+            CREATE TABLE sentences (id INTEGER PRIMARY KEY AUTOINCREMENT, source_id INTEGER NOT NULL,
+                                    text TEXT NOT NULL);
+            CREATE TABLE lexemes (id INTEGER PRIMARY KEY AUTOINCREMENT, lemma TEXT NOT NULL UNIQUE);
+            CREATE TABLE wordforms (id INTEGER PRIMARY KEY AUTOINCREMENT, lexeme_id INTEGER NOT NULL,
+                                    word TEXT NOT NULL, pos_id INTEGER, tags TEXT, UNIQUE (lexeme_id, word));
+            CREATE TABLE tokens (id INTEGER PRIMARY KEY AUTOINCREMENT, sentence_id INTEGER NOT NULL,
+                                 wordform_id INTEGER NOT NULL, position INTEGER);
+            CREATE INDEX idx_token_wordform ON tokens(wordform_id);
+            INSERT INTO sources (file_path, file_name) VALUES ('a.txt', 'a.txt');
+            INSERT INTO sentences (source_id, text) VALUES (1, 'Кот спал.');
+            INSERT INTO lexemes (lemma) VALUES ('кот');
+            INSERT INTO wordforms (lexeme_id, word, tags) VALUES (1, 'Кот', 'NOUN');
+            INSERT INTO tokens (sentence_id, wordform_id, position) VALUES (1, 1, 0);
+        ''')
+    conn.close()
+
+    model = CorpusModel(db_path)
+    try:
+        assert [(row['word'], row['word_freq']) for row in model.search('КОТ')] == [('Кот', 1)]
+        assert_index_driven(model.explain_search('кот'))
+    finally:
+        model.close()
@@ -1,15 +1,140 @@
 # --- VIEW ---
 
-import re
-
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTextEdit, QLineEdit, QLabel,
-    QTabWidget, QTableWidget, QHeaderView,
-    QFormLayout, QGroupBox, QScrollArea
+    QTabWidget, QTableWidget, QTableView, QHeaderView,
+    QFormLayout, QGroupBox, QScrollArea,
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionViewItem
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QTextCursor, QColor, QPalette
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QPointF
+from PyQt6.QtGui import QColor, QPalette, QTextCharFormat, QTextLayout, QTextOption
+
+# Роль данных со смещениями (начало, конец) найденной словоформы в контексте
+MATCH_ROLE = Qt.ItemDataRole.UserRole
+
+
+class SearchResultsModel(QAbstractTableModel):
+    """Результаты поиска; следующие страницы подгружаются из SearchCursor при прокрутке"""
+
+    HEADERS = ["Слово", "Лемма", "Теги", "Частота слова", "Частота леммы", "Контекст", "Источник"]
+    KEYS = ['word', 'lemma', 'tags', 'word_freq', 'lemma_freq', 'context', 'source']
+    CONTEXT_COLUMN = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._cursor = None
+
+    def set_cursor(self, cursor):
+        """Показать новые результаты и сразу загрузить первую страницу"""
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = cursor
+        self.endResetModel()
+        if cursor is not None:
+            self.fetchMore(QModelIndex())
+
+    def clear(self):
+        self.set_cursor(None)
+
+    def row(self, row):
+        return self._rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.KEYS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(row.get(self.KEYS[index.column()], ''))
+        if role == MATCH_ROLE and index.column() == self.CONTEXT_COLUMN:
+            return row.get('match_span')
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._cursor is not None and not self._cursor.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        rows = self._cursor.fetch()
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+
+class ContextHighlightDelegate(QStyledItemDelegate):
+    """Рисует контекст по центру ячейки с подсвеченной словоформой (смещения — MATCH_ROLE)"""
+
+    HIGHLIGHT = QColor("#3399FF")
+    HIGHLIGHT_TEXT = QColor("white")
+    MARGIN = 4
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        text = opt.text
+        opt.text = ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        layout = QTextLayout(text, opt.font)
+        text_option = QTextOption(Qt.AlignmentFlag.AlignHCenter)
+        text_option.setWrapMode(QTextOption.WrapMode.WrapAtWordBoundaryOrAnywhere)
+        layout.setTextOption(text_option)
+
+        span = index.data(MATCH_ROLE)
+        if span:
+            fmt = QTextCharFormat()
+            fmt.setBackground(self.HIGHLIGHT)
+            fmt.setForeground(self.HIGHLIGHT_TEXT)
+            highlight = QTextLayout.FormatRange()
+            # Смещения модели — в символах Python, QTextLayout считает в UTF-16
+            highlight.start = _utf16_len(text[:span[0]])
+            highlight.length = _utf16_len(text[span[0]:span[1]])
+            highlight.format = fmt
+            layout.setFormats([highlight])
+
+        rect = opt.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        height = 0.0
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(rect.width())
+            line.setPosition(QPointF(0, height))
+            height += line.height()
+        layout.endLayout()
+
+        painter.save()
+        painter.setClipRect(opt.rect)
+        selected = bool(opt.state & QStyle.StateFlag.State_Selected)
+        painter.setPen(opt.palette.color(
+            QPalette.ColorRole.HighlightedText if selected else QPalette.ColorRole.Text
+        ))
+        # Как и раньше: по центру, а длинный текст — с начала, обрезанный снизу
+        top = rect.top() + max(0.0, (rect.height() - height) / 2)
+        layout.draw(painter, QPointF(rect.left(), top))
+        painter.restore()
+
+
+def _utf16_len(text):
+    return len(text.encode('utf-16-le')) // 2
 
 
 class CorpusView(QMainWindow):
@@ -101,11 +226,13 @@ class CorpusView(QMainWindow):
         tag_box.addWidget(self.btn_search)
         s_layout.addLayout(tag_box)
 
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(7)
-        self.results_table.setHorizontalHeaderLabels(
-            ["Слово", "Лемма", "Теги", "Частота слова", "Частота леммы", "Контекст", "Источник"]
+        self.results_model = SearchResultsModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.setItemDelegateForColumn(
+            SearchResultsModel.CONTEXT_COLUMN, ContextHighlightDelegate(self.results_table)
         )
+        self.results_table.verticalHeader().setDefaultSectionSize(65)
         header = self.results_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         header.setDefaultSectionSize(120)
@@ -117,7 +244,7 @@ class CorpusView(QMainWindow):
         header.resizeSection(5, 350)
         header.resizeSection(6, 150)
         header.setStretchLastSection(False)
-        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.results_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.results_table.setWordWrap(True)
         s_layout.addWidget(self.results_table)
 
@@ -198,6 +325,7 @@ class CorpusView(QMainWindow):
         <p>Результаты отображаются в таблице со столбцами:<br>
         <b>Слово, Лемма, Теги, Частота слова, Частота леммы, Контекст, Источник</b>.<br>
         Найденное слово подсвечивается в столбце «Контекст».<br>
+        Результаты подгружаются порциями по мере прокрутки таблицы.<br>
         Ширину столбцов можно изменять перетаскиванием границ заголовков.</p>
 
         <h3>&#128202; Вкладка «Аналитика»</h3>
@@ -250,46 +378,3 @@ class CorpusView(QMainWindow):
         self.tabs.addTab(self.tab_stats, "Аналитика")
         self.tabs.addTab(self.tab_help, "Справка")
         layout.addWidget(self.tabs)
-
-    def create_highlighted_context(self, context, search_word):
-        """Создает виджет с центрированным контекстом и постоянной подсветкой"""
-        display = QTextEdit()
-        display.setReadOnly(True)
-        display.setMaximumHeight(60)
-        display.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        display.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-
-        match = re.search(rf'\b{re.escape(search_word)}\b', context, re.IGNORECASE)
-
-        if match:
-            start, end = match.span()
-            display.setText(context)
-            display.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            palette = display.palette()
-            palette.setColor(QPalette.ColorGroup.Active, QPalette.ColorRole.Highlight, QColor("#3399FF"))
-            palette.setColor(QPalette.ColorGroup.Active, QPalette.ColorRole.HighlightedText, QColor("white"))
-            palette.setColor(QPalette.ColorGroup.Inactive, QPalette.ColorRole.Highlight, QColor("#3399FF"))
-            palette.setColor(QPalette.ColorGroup.Inactive, QPalette.ColorRole.HighlightedText, QColor("white"))
-            display.setPalette(palette)
-
-            def restore_selection():
-                cursor = display.textCursor()
-                if cursor.selectionStart() != start or cursor.selectionEnd() != end:
-                    cursor.setPosition(start)
-                    cursor.movePosition(
-                        QTextCursor.MoveOperation.Right,
-                        QTextCursor.MoveMode.KeepAnchor,
-                        end - start
-                    )
-                    display.blockSignals(True)
-                    display.setTextCursor(cursor)
-                    display.blockSignals(False)
-
-            restore_selection()
-            display.selectionChanged.connect(restore_selection)
-        else:
-            display.setText(context)
-            display.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        return display